@@ -1,24 +1,15 @@
-from agents import Agent, Runner, set_tracing_disabled, function_tool, ModelSettings
+from agents import Agent, Runner, set_tracing_disabled, ModelSettings
 from dotenv import load_dotenv
 from my_config.gemini_config import run_config
+from my_tools.tools import registry
 
 load_dotenv()
 set_tracing_disabled(True)
 
-@function_tool
-def add_numbers(a:int ,b:int):
-    result = a + b
-    print("add_numbers function called")
-    return result
-
-
 Agent= Agent(
     name="Helpful Agent",
     instructions="""You are an helpful agent helping users to in what they want you have an add_numbers function that adds two numbers together. use it when you like""",
-    tools=[
-        add_numbers
-    
-    ],  
+    tools=registry.select(names=["add_numbers"]),
     model_settings=ModelSettings( tool_choice="auto")  # Automatically use tools when needed
 )
 
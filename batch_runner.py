@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from agents import Runner, set_tracing_disabled
+
+from handoff_agent.main import pick_starting_agent
+from handoff_agent.router import router_stats
+from my_cache.response_cache import get_response_cache
+from my_config.gemini_config import get_model_pool, get_run_config
+from my_runtime.metrics import start_run
+from my_runtime.rate_limit import BATCH, request_priority
+from my_tools.calculator import evaluate_prompt
+
+set_tracing_disabled(True)
+
+
+def read_prompts(lines):
+    """Parse prompts from plain lines or JSONL objects with a "prompt" (or "input") field.
+
+    A malformed JSONL line becomes an item carrying an "error", reported in its place.
+    """
+    prompts = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                prompts.append({"id": number, "prompt": line, "error": f"line {number}: invalid JSON ({e})"})
+                continue
+            prompt = record.get("prompt") or record.get("input")
+            if not prompt:
+                prompts.append({"id": record.get("id", number), "prompt": None, "error": f"line {number}: no prompt"})
+                continue
+            prompts.append({"id": record.get("id", number), "prompt": prompt})
+        else:
+            prompts.append({"id": number, "prompt": line})
+    return prompts
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_one(item, timeout):
+    """Run a single prompt through the agents and return its result record"""
+    prompt = item["prompt"]
+    record = {"id": item["id"], "prompt": prompt}
+    if "error" in item:
+        return {**record, "error": item["error"], "latency": 0.0}
+    started = time.perf_counter()
+    try:
+        local_answer = evaluate_prompt(prompt)
+        if local_answer:
+            expression, value = local_answer
+            record.update(final_agent="Calculator", output=f"{expression} = {value}")
+        else:
+            starting_agent = pick_starting_agent(prompt)
+            response_cache = get_response_cache()
+            cached = response_cache.lookup(prompt, starting_agent) if response_cache else None
+            if cached:
+                record.update(cached, cached=True)
+            else:
+                tracker = start_run(prompt, starting_agent.name)
+                try:
+                    result = await asyncio.wait_for(
+                        Runner.run(
+                            starting_agent=starting_agent,
+                            input=prompt,
+                            run_config=get_run_config(),
+                        ),
+                        timeout,
+                    )
+                except Exception as e:
+                    if tracker:
+                        tracker.finish(error=e)
+                    raise
+                if tracker:
+                    tracker.finish(result)
+                if response_cache:
+                    response_cache.save(prompt, starting_agent, result.final_output, result.last_agent)
+                usage = result.context_wrapper.usage
+                record.update(
+                    final_agent=result.last_agent.name,
+                    output=str(result.final_output),
+                    usage={
+                        "requests": usage.requests,
+                        "input_tokens": usage.input_tokens,
+                        "output_tokens": usage.output_tokens,
+                        "total_tokens": usage.total_tokens,
+                    },
+                )
+    except asyncio.TimeoutError:
+        record["error"] = f"timed out after {timeout}s"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["latency"] = round(time.perf_counter() - started, 4)
+    return record
+
+
+async def run_batch(prompts, out=None, concurrency=5, timeout=120.0, on_result=None):
+    """Run prompts concurrently (at most `concurrency` in flight), writing JSONL as results finish"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(item):
+        # Each prompt runs in its own task, so this only deprioritizes batch requests
+        request_priority.set(BATCH)
+        async with semaphore:
+            return await run_one(item, timeout)
+
+    started = time.perf_counter()
+    results = []
+    for finished in asyncio.as_completed([bounded(item) for item in prompts]):
+        record = await finished
+        results.append(record)
+        if out is not None:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+        if on_result is not None:
+            on_result(record)
+
+    return summarize(results, time.perf_counter() - started)
+
+
+def summarize(results, elapsed):
+    latencies = [r["latency"] for r in results if "error" not in r]
+    errors = [r for r in results if "error" in r]
+    total_tokens = sum(r.get("usage", {}).get("total_tokens", 0) for r in results)
+    return {
+        "requests": len(results),
+        "succeeded": len(latencies),
+        "failed": len(errors),
+        "wall_time": round(elapsed, 3),
+        "throughput": round(len(results) / elapsed, 3) if elapsed else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "latency_max": max(latencies, default=0.0),
+        "total_tokens": total_tokens,
+    }
+
+
+def print_summary(summary, file=None):
+    print("\n" + "=" * 50, file=file)
+    print("📊 **Batch Summary**", file=file)
+    print(f"   Requests: {summary['requests']} ({summary['succeeded']} ok, {summary['failed']} failed)", file=file)
+    print(f"   Wall time: {summary['wall_time']:.2f}s  Throughput: {summary['throughput']:.2f} req/s", file=file)
+    print(
+        f"   Latency p50/p90/p99/max: {summary['latency_p50']:.2f}s / {summary['latency_p90']:.2f}s"
+        f" / {summary['latency_p99']:.2f}s / {summary['latency_max']:.2f}s",
+        file=file,
+    )
+    print(f"   Tokens: {summary['total_tokens']}", file=file)
+    print(f"   Router: {router_stats.summary()}", file=file)
+    for limiter in get_model_pool().limiters():
+        print(f"   {limiter.summary()}", file=file)
+    print("=" * 50, file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many prompts concurrently through the triage system")
+    parser.add_argument("input", nargs="?", default="-", help="prompt file (one per line or JSONL), '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file, '-' for stdout")
+    parser.add_argument("-c", "--concurrency", type=int, default=5, help="max requests in flight")
+    parser.add_argument("-t", "--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        prompts = read_prompts(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            prompts = read_prompts(f)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = asyncio.run(run_batch(prompts, out, args.concurrency, args.timeout))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    # Keep stdout clean for JSONL when results go there
+    print_summary(summary, file=sys.stderr if args.output == "-" else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Time to the first specialist token with the explained handoff versus fast handoff mode.
+
+    python benchmarks/handoff_latency.py --mock --repeat 3
+
+Every query starts at triage. "explain" is the default triage that states its routing
+decision before transferring; "fast" forces the transfer call straight away with a context
+payload (HANDOFF_MODE=fast). Reported per mode: time to the first specialist token, triage
+output tokens, routing accuracy and total time. With --mock, triage streams
+--preamble-tokens words before a transfer it isn't forced to make, like a real model would.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import Runner, set_tracing_disabled  # noqa: E402
+
+set_tracing_disabled(True)
+
+MODES = ("explain", "fast")
+
+
+async def measure(agents, query: str, expected: str, timeout: float) -> dict:
+    from handoff_agent.prompts import TRIAGE
+    from my_config.gemini_config import get_run_config
+
+    triage = agents[TRIAGE]
+    started = time.perf_counter()
+    first_token = None
+    triage_tokens = 0
+    agent = triage.name
+    res = Runner.run_streamed(triage, query, run_config=get_run_config())
+    try:
+        async with asyncio.timeout(timeout):
+            async for event in res.stream_events():
+                if event.type == "agent_updated_stream_event":
+                    agent = event.new_agent.name
+                elif event.type == "raw_response_event":
+                    kind = getattr(event.data, "type", "")
+                    if kind == "response.completed" and agent == triage.name and event.data.response.usage:
+                        triage_tokens += event.data.response.usage.output_tokens
+                    elif kind == "response.output_text.delta" and agent != triage.name and first_token is None:
+                        first_token = time.perf_counter() - started
+    except Exception as e:
+        res.cancel()
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "error": None,
+        "first_token": first_token,
+        "seconds": time.perf_counter() - started,
+        "triage_tokens": triage_tokens,
+        "routed": res.last_agent.name == agents[expected].name,
+    }
+
+
+async def run(args) -> dict:
+    from handoff_agent.main import SAMPLE_QUERIES, build_agents
+
+    agents = {mode: build_agents(handoff_mode=mode) for mode in MODES}
+    rows = {mode: [] for mode in MODES}
+    for i in range(args.repeat):
+        for j, (query, expected) in enumerate(SAMPLE_QUERIES):
+            # Alternate the order so neither mode always goes first
+            for mode in MODES[:: -1 if (i + j) % 2 else 1]:
+                rows[mode].append(await measure(agents[mode], query, expected, args.timeout))
+    return rows
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else 0.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the sample queries")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per run")
+    parser.add_argument("--mock", action="store_true", help="run against the local mock model server")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="mock latency to first token")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="mock latency per token")
+    parser.add_argument("--preamble-tokens", type=int, default=80, help="mock triage explanation length")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        if args.mock:
+            from mock_server import BackgroundMockServer, MockBehaviour, use_mock_endpoint
+
+            behaviour = MockBehaviour(args.first_token_ms, args.token_ms, handoff_preamble_tokens=args.preamble_tokens)
+            use_mock_endpoint(stack.enter_context(BackgroundMockServer(behaviour)))
+        rows = asyncio.run(run(args))
+
+    report = {}
+    for mode, mode_rows in rows.items():
+        ok = [row for row in mode_rows if not row["error"]]
+        report[mode] = {
+            "runs": len(mode_rows),
+            "routed": sum(row["routed"] for row in ok),
+            "errors": [row["error"] for row in mode_rows if row["error"]],
+            "first_token_p50": _median(row["first_token"] for row in ok),
+            "seconds_p50": _median(row["seconds"] for row in ok),
+            "triage_tokens": sum(row["triage_tokens"] for row in ok),
+        }
+    saved = report["explain"]["first_token_p50"] - report["fast"]["first_token_p50"]
+    if args.json:
+        print(json.dumps({"modes": report, "first_token_saved": saved}, indent=2))
+        return 0
+
+    print(f"🔄 Handoff latency, {report['explain']['runs']} queries per mode")
+    print(f"   {'mode':<9}{'routed':>8}{'1st token p50':>15}{'total p50':>11}{'triage tok':>12}{'err':>5}")
+    for mode, row in report.items():
+        print(f"   {mode:<9}{row['routed']:>4}/{row['runs']:<3}{row['first_token_p50']:>15.3f}"
+              f"{row['seconds_p50']:>11.3f}{row['triage_tokens']:>12}{len(row['errors']):>5}")
+        for error in row["errors"][:3]:
+            print(f"   ⚠️  {error}")
+    print(f"   Fast handoff reaches the first specialist token {saved * 1000:.0f} ms sooner")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Fail if importing the agent modules gets slow or starts doing work at import time.
+
+    python benchmarks/import_budget.py --budget-ms 2000
+
+Each module is imported in a fresh interpreter with stdin closed, so a stray
+input() or eager network call shows up as a failure instead of a hang.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["handoff_agent.main"]
+
+
+def time_import(module: str, timeout: float) -> float:
+    """Import `module` in a fresh interpreter and return the wall time in milliseconds"""
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip()}")
+    # Prefer the in-process measurement; fall back to wall time if nothing was printed
+    lines = proc.stdout.strip().splitlines()
+    return float(lines[-1]) if lines else (time.perf_counter() - started) * 1000
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("IMPORT_BUDGET_MS", "2000")),
+        help="maximum median import time per module (env IMPORT_BUDGET_MS)",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="fresh-interpreter runs per module")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before an import counts as hung")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        try:
+            timings = [time_import(module, args.timeout) for _ in range(args.runs)]
+        except subprocess.TimeoutExpired:
+            print(f"❌ import {module}: hung for more than {args.timeout:.0f}s")
+            failed = True
+            continue
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failed = True
+            continue
+
+        median = statistics.median(timings)
+        ok = median <= args.budget_ms
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} import {module}: {median:.0f} ms (budget {args.budget_ms:.0f} ms)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
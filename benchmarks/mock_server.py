@@ -0,0 +1,343 @@
+"""Local stand-in for the OpenAI-compatible chat completions endpoint (and weatherapi.com).
+
+    python benchmarks/mock_server.py --port 8765 --first-token-ms 300 --token-ms 15
+
+Point the app at it with GEMINI_BASE_URL=http://127.0.0.1:8765/v1 and
+WEATHER_API_URL=http://127.0.0.1:8765/v1/current.json (any API key works).
+
+Responses are scripted from the request itself: an agent that can hand off
+transfers to the specialist the local router scores highest, an agent with
+tools calls its tool once, and everything else streams a canned answer.
+A --script file (JSON list) can override this with an exact sequence of
+{"text": ...} / {"tool": name, "arguments": {...}} responses.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handoff_agent.router import score  # noqa: E402
+
+ANSWER_WORDS = (
+    "Here is a detailed answer produced by the local mock model so that the "
+    "orchestration can be measured without any network access at all."
+).split()
+
+
+class MockBehaviour:
+    def __init__(self, first_token_ms=200.0, token_ms=10.0, answer_tokens=60, script=None, handoff_preamble_tokens=0):
+        self.first_token = first_token_ms / 1000
+        self.token_delay = token_ms / 1000
+        self.answer_tokens = answer_tokens
+        # Words triage "says" before its transfer call unless tool_choice forces the call alone
+        self.handoff_preamble_tokens = handoff_preamble_tokens
+        self.script = list(script or [])
+        self.requests = 0
+        self.status_overrides = []  # e.g. [429, 503] to fail the next requests
+
+    def plan(self, body: dict) -> dict:
+        """Decide what the next completion looks like"""
+        if self.script:
+            return self.script.pop(0)
+
+        messages = body.get("messages", [])
+        tools = [tool["function"]["name"] for tool in body.get("tools", [])]
+        last = messages[-1] if messages else {}
+        user_text = next(
+            (m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        if isinstance(user_text, list):
+            user_text = " ".join(part.get("text", "") for part in user_text)
+
+        # Has one of this agent's own tools already answered? (a handoff result doesn't count)
+        call_names = {
+            call["id"]: call["function"]["name"]
+            for m in messages if m.get("role") == "assistant"
+            for call in m.get("tool_calls") or []
+        }
+        tool_answered = last.get("role") == "tool" and call_names.get(last.get("tool_call_id"), "") in tools
+
+        # Triage: hand off to the best-scoring specialist
+        transfers = [name for name in tools if name.startswith("transfer_to_")]
+        if transfers and not tool_answered:
+            scores = score(user_text)
+            best = max(scores, key=scores.get)
+            target = next((name for name in transfers if best in name), transfers[0])
+            plan = {"tool": target, "arguments": _handoff_arguments(body, target, user_text)}
+            if self.handoff_preamble_tokens and body.get("tool_choice") != "required":
+                words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(self.handoff_preamble_tokens)]
+                plan["text"] = " ".join(words)
+            return plan
+
+        # Specialists with tools call one tool, then answer once the result is back
+        if not tool_answered:
+            if "get_weather" in tools:
+                match = re.search(r"\bin ([A-Z][\w ,]+?)(?:[?.!]|$)", user_text)
+                cities = [c.strip() for c in re.split(r",|\band\b", match.group(1)) if c.strip()] if match else []
+                if len(cities) > 1 and "get_weather_many" in tools:
+                    return {"tool": "get_weather_many", "arguments": {"cities": cities}}
+                return {"tool": "get_weather", "arguments": {"city": cities[0] if cities else "London"}}
+            if "calculate" in tools:
+                expressions = re.findall(r"[\d(][\d\s.+\-*/^()]*\d\)?", user_text) or ["2+2"]
+                return {"tool": "calculate", "arguments": {"expressions": [e.strip() for e in expressions]}}
+
+        words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(self.answer_tokens)]
+        return {"text": " ".join(words)}
+
+
+def _handoff_arguments(body: dict, tool_name: str, user_text: str) -> dict:
+    """Fill a transfer tool's parameters (fast handoff mode) from the user's message"""
+    tool = next(t["function"] for t in body.get("tools", []) if t["function"]["name"] == tool_name)
+    arguments = {}
+    for name, schema in (tool.get("parameters") or {}).get("properties", {}).items():
+        if schema.get("type") != "array":
+            arguments[name] = user_text
+        elif name == "numbers":
+            arguments[name] = re.findall(r"\d+(?:\.\d+)?", user_text)
+        elif name == "cities":
+            arguments[name] = re.findall(r"\bin ([A-Z][a-z]+(?: [A-Z][a-z]+)?)", user_text)
+        else:
+            arguments[name] = []
+    return arguments
+
+
+def _chunk(completion_id, model, delta=None, finish_reason=None, usage=None) -> dict:
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [] if usage else [{"index": 0, "delta": delta or {}, "finish_reason": finish_reason}],
+        **({"usage": usage} if usage else {}),
+    }
+
+
+def _usage(body: dict, completion_tokens: int) -> dict:
+    prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class MockModelServer:
+    """Minimal HTTP/1.1 server with keep-alive, chunked SSE streaming and JSON responses"""
+
+    def __init__(self, host="127.0.0.1", port=0, behaviour: MockBehaviour | None = None):
+        self.host = host
+        self.port = port
+        self.behaviour = behaviour or MockBehaviour()
+        self._server = None
+        self._connections = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                raw = await reader.readexactly(length) if length else b""
+                await self._dispatch(method, target, raw, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _dispatch(self, method, target, raw, writer):
+        path = target.split("?", 1)[0]
+        if path.endswith("/current.json"):
+            city = re.search(r"[?&]q=([^&]*)", target)
+            city = city.group(1).replace("+", " ").replace("%20", " ") if city else "London"
+            await asyncio.sleep(self.behaviour.first_token / 4)
+            payload = {"location": {"name": city}, "current": {"temp_c": 21.0, "condition": {"text": "Partly cloudy"}}}
+            await self._send_json(writer, 200, payload)
+            return
+        if method != "POST" or not path.endswith("/chat/completions"):
+            await self._send_json(writer, 404, {"error": {"message": f"no route for {path}"}})
+            return
+
+        self.behaviour.requests += 1
+        if self.behaviour.status_overrides:
+            status = self.behaviour.status_overrides.pop(0)
+            await self._send_json(
+                writer, status, {"error": {"message": "mock failure", "code": status}}, {"Retry-After": "1"}
+            )
+            return
+
+        body = json.loads(raw or b"{}")
+        plan = self.behaviour.plan(body)
+        if body.get("stream"):
+            await self._stream(writer, body, plan)
+        else:
+            await asyncio.sleep(self.behaviour.first_token)
+            await self._send_json(writer, 200, self._completion(body, plan))
+
+    def _completion(self, body, plan) -> dict:
+        message = {"role": "assistant", "content": plan.get("text")}
+        if "tool" in plan:
+            message["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:8]}",
+                "type": "function",
+                "function": {"name": plan["tool"], "arguments": json.dumps(plan.get("arguments", {}))},
+            }]
+            finish, tokens = "tool_calls", 10 + len(plan.get("text", "").split())
+        else:
+            finish, tokens = "stop", len(plan["text"].split())
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+            "usage": _usage(body, tokens),
+        }
+
+    async def _stream(self, writer, body, plan):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nTransfer-Encoding: chunked\r\n\r\n"
+        )
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+
+        async def send(data):
+            payload = f"data: {data}\n\n".encode()
+            writer.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+            await writer.drain()
+
+        await asyncio.sleep(self.behaviour.first_token)
+        words = plan.get("text", "").split()
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else " " + word}
+            if i == 0:
+                delta["role"] = "assistant"
+            await send(json.dumps(_chunk(completion_id, model, delta)))
+            if self.behaviour.token_delay:
+                await asyncio.sleep(self.behaviour.token_delay)
+        if "tool" in plan:
+            call = {
+                "index": 0,
+                "id": f"call_{uuid.uuid4().hex[:8]}",
+                "type": "function",
+                "function": {"name": plan["tool"], "arguments": json.dumps(plan.get("arguments", {}))},
+            }
+            await send(json.dumps(_chunk(completion_id, model, {"role": "assistant", "tool_calls": [call]})))
+            await send(json.dumps(_chunk(completion_id, model, {}, "tool_calls")))
+            tokens = 10 + len(words)
+        else:
+            await send(json.dumps(_chunk(completion_id, model, {}, "stop")))
+            tokens = len(words)
+        await send(json.dumps(_chunk(completion_id, model, usage=_usage(body, tokens))))
+        await send("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload, extra_headers=None):
+        data = json.dumps(payload).encode()
+        headers = "".join(f"{name}: {value}\r\n" for name, value in (extra_headers or {}).items())
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n{headers}\r\n".encode()
+            + data
+        )
+        await writer.drain()
+
+
+class BackgroundMockServer:
+    """Runs a MockModelServer on its own thread and loop so it doesn't compete with the code under test"""
+
+    def __init__(self, behaviour: MockBehaviour | None = None, port: int = 0):
+        self.server = MockModelServer(port=port, behaviour=behaviour)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result()
+        return self.server
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def use_mock_endpoint(server: MockModelServer) -> None:
+    """Point settings at the mock server; call before the model client is first built"""
+    os.environ["GEMINI_BASE_URL"] = server.base_url
+    os.environ["GEMINI_API_KEY"] = "mock-key"
+    os.environ.setdefault("GEMINI_MODEL_NAME", "mock-model")
+    os.environ["WEATHER_API_URL"] = f"{server.base_url}/current.json"
+    os.environ["WEATHER_API_KEY"] = "mock-key"
+    # Settings may already have been read at import time (agents pick their tiers then)
+    from my_config.settings import get_settings
+
+    get_settings.cache_clear()
+
+
+async def _serve(args):
+    script = json.load(open(args.script, encoding="utf-8")) if args.script else None
+    behaviour = MockBehaviour(args.first_token_ms, args.token_ms, args.answer_tokens, script, args.handoff_preamble_tokens)
+    server = await MockModelServer(args.host, args.port, behaviour).start()
+    print(f"🧪 Mock model server on {server.base_url}")
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-ms", type=float, default=200.0, help="delay before the first chunk")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="delay between streamed tokens")
+    parser.add_argument("--answer-tokens", type=int, default=60, help="words in a canned text answer")
+    parser.add_argument("--handoff-preamble-tokens", type=int, default=0,
+                        help="words triage streams before a transfer call it isn't forced to make")
+    parser.add_argument("--script", help="JSON file with an exact list of responses to serve in order")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
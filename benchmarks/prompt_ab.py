@@ -0,0 +1,90 @@
+"""A/B check that every instruction variant still routes the sample queries correctly.
+
+    python benchmarks/prompt_ab.py --variants full compact
+
+Each query starts at the triage agent (the local fast path is bypassed on purpose)
+and the run is cancelled as soon as triage hands off, so only routing is paid for.
+Exits non-zero if a variant routes fewer queries correctly than the baseline.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import Runner, set_tracing_disabled  # noqa: E402
+
+from handoff_agent.main import SAMPLE_QUERIES, build_agents  # noqa: E402
+from handoff_agent.prompts import TEMPLATES, TRIAGE, fingerprint  # noqa: E402
+from my_config.gemini_config import get_run_config  # noqa: E402
+
+set_tracing_disabled(True)
+
+
+async def route_once(agents, query: str, timeout: float):
+    """Return (specialist name or None, seconds until the handoff)"""
+    started = time.perf_counter()
+    res = Runner.run_streamed(starting_agent=agents[TRIAGE], input=query, run_config=get_run_config())
+    routed_to = None
+    try:
+        async with asyncio.timeout(timeout):
+            async for event in res.stream_events():
+                if event.type == "agent_updated_stream_event" and event.new_agent is not agents[TRIAGE]:
+                    routed_to = event.new_agent.name
+                    break
+    except TimeoutError:
+        pass
+    except Exception as e:
+        print(f"   ⚠️  {query}: {type(e).__name__}: {e}")
+    finally:
+        res.cancel()
+    return routed_to, time.perf_counter() - started
+
+
+async def evaluate(variant: str, timeout: float) -> dict:
+    agents = build_agents(variant)
+    results = await asyncio.gather(*(route_once(agents, query, timeout) for query, _ in SAMPLE_QUERIES))
+    rows = []
+    for (query, expected_key), (routed_to, seconds) in zip(SAMPLE_QUERIES, results):
+        expected = agents[expected_key].name
+        rows.append({"query": query, "expected": expected, "got": routed_to, "ok": routed_to == expected, "seconds": seconds})
+    return {
+        "variant": variant,
+        "fingerprint": fingerprint(variant),
+        "correct": sum(row["ok"] for row in rows),
+        "mean_seconds": sum(row["seconds"] for row in rows) / len(rows),
+        "rows": rows,
+    }
+
+
+async def run(variants, timeout):
+    return [await evaluate(variant, timeout) for variant in variants]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--variants", nargs="+", default=list(TEMPLATES), choices=list(TEMPLATES))
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for a handoff")
+    args = parser.parse_args(argv)
+
+    reports = asyncio.run(run(args.variants, args.timeout))
+    for report in reports:
+        print(f"\n🧪 {report['variant']} [{report['fingerprint']}]: "
+              f"{report['correct']}/{len(report['rows'])} routed correctly, "
+              f"mean time to handoff {report['mean_seconds']:.2f}s")
+        for row in report["rows"]:
+            mark = "✅" if row["ok"] else "❌"
+            print(f"   {mark} {row['query']} → {row['got'] or 'no handoff'} (expected {row['expected']})")
+
+    baseline = reports[0]["correct"]
+    regressed = [r["variant"] for r in reports[1:] if r["correct"] < baseline]
+    if regressed:
+        print(f"\n❌ Routing regressed for: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
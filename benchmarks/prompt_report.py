@@ -0,0 +1,87 @@
+"""Report the prompt size and input cost of every agent, per instruction variant.
+
+    python benchmarks/prompt_report.py --price-per-mtok 0.10 --calls 100000
+
+Counts use tiktoken when it is installed, otherwise a ~4 characters/token estimate.
+Tool and handoff schemas are included because they are sent with the instructions.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import Handoff, handoff  # noqa: E402
+
+from handoff_agent.main import build_agents  # noqa: E402
+from handoff_agent.prompts import PROMPT_VERSION, SHARED_PREFIX, TEMPLATES, fingerprint  # noqa: E402
+from my_runtime.memory import estimate_tokens  # noqa: E402
+
+
+def token_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens, "estimate (~4 chars/token)"
+    encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text)), "tiktoken o200k_base"
+
+
+def agent_prompt_parts(agent) -> dict:
+    tools = [
+        json.dumps({"name": tool.name, "description": tool.description, "parameters": tool.params_json_schema})
+        for tool in agent.tools
+    ]
+    # Plain agents become the SDK's default transfer tool; fast handoffs already are Handoff objects
+    handoffs = [
+        json.dumps({"name": tool.tool_name, "description": tool.tool_description, "parameters": tool.input_json_schema})
+        for tool in (target if isinstance(target, Handoff) else handoff(target) for target in agent.handoffs)
+    ]
+    return {"instructions": agent.instructions, "schemas": "".join(tools + handoffs)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--price-per-mtok", type=float, default=0.10, help="USD per million input tokens")
+    parser.add_argument("--calls", type=int, default=1000, help="calls per agent to price")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    count, method = token_counter()
+    report = {
+        "prompt_version": PROMPT_VERSION,
+        "token_counter": method,
+        "shared_prefix_tokens": count(SHARED_PREFIX),
+        "variants": {},
+    }
+    for variant in TEMPLATES:
+        rows = {}
+        for key, agent in build_agents(variant).items():
+            parts = agent_prompt_parts(agent)
+            tokens = count(parts["instructions"]) + count(parts["schemas"])
+            rows[agent.name] = {
+                "instruction_chars": len(parts["instructions"]),
+                "tokens": tokens,
+                "cost": tokens * args.calls * args.price_per_mtok / 1_000_000,
+            }
+        report["variants"][variant] = {"fingerprint": fingerprint(variant), "agents": rows}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"📏 Prompt report {PROMPT_VERSION} ({method}), shared prefix {report['shared_prefix_tokens']} tokens")
+    print(f"   Cost = input tokens x {args.calls} calls at ${args.price_per_mtok}/M tokens")
+    for variant, data in report["variants"].items():
+        print(f"\n{variant} [{data['fingerprint']}]")
+        print(f"   {'Agent':<20}{'chars':>8}{'tokens':>9}{'cost':>11}")
+        for name, row in data["agents"].items():
+            print(f"   {name:<20}{row['instruction_chars']:>8}{row['tokens']:>9}{row['cost']:>11.4f}")
+        total = sum(row["tokens"] for row in data["agents"].values())
+        print(f"   {'Total':<20}{'':>8}{total:>9}{sum(r['cost'] for r in data['agents'].values()):>11.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Replay recorded sessions and flag latency or event-count regressions.
+
+    REPLAY_MODE=record REPLAY_FILE=cassettes/weather.replay.gz python main.py   # record once
+    python benchmarks/replay_regression.py cassettes/ --save baseline.json      # pin a baseline
+    python benchmarks/replay_regression.py cassettes/ --baseline baseline.json  # after a change
+
+Every run in a cassette is re-run through today's routing and agents, with the model and
+weather API answered from the recording at its original pace (--speed scales it). Each run
+is compared with the baseline file, or with the numbers captured while recording when no
+baseline is given. Exits 1 when any run regressed, so it can gate CI.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def find_cassettes(paths) -> list:
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found += sorted(glob.glob(os.path.join(path, "*.replay.gz")))
+        else:
+            found.append(path)
+    return found
+
+
+async def replay_cassette(cassette, timeout: float) -> list:
+    from agents import Runner
+
+    from handoff_agent.main import pick_starting_agent
+    from my_config.gemini_config import get_run_config
+    from my_runtime.metrics import RunTracker
+    from my_runtime.replay import use_cassette
+    from my_tools.weather_cache import get_weather_cache
+
+    use_cassette(cassette)
+    # A weather answer cached by an earlier cassette would skip this one's recorded call
+    get_weather_cache().clear()
+    results = []
+    for run in cassette.runs:
+        prompt = run["prompt"]
+        agent = pick_starting_agent(prompt)
+        tracker = RunTracker(prompt, agent.name)
+        res = Runner.run_streamed(agent, prompt, run_config=get_run_config())
+        try:
+            async with asyncio.timeout(timeout):
+                async for event in res.stream_events():
+                    tracker.observe(event)
+            record = tracker.finish(res)
+        except Exception as e:
+            res.cancel()
+            record = tracker.finish(error=e)
+        results.append({key: record[key] for key in ("duration", "time_to_first_token", "events", "agent_chain", "error")})
+        results[-1]["prompt"] = prompt
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta: float, event_tolerance: int) -> list:
+    """Reasons this run regressed against its baseline (empty when it didn't)"""
+    problems = []
+    if current["error"] and not baseline.get("error"):
+        problems.append(f"error: {current['error']}")
+    for field, label in (("duration", "latency"), ("time_to_first_token", "first token")):
+        now, before = current.get(field), baseline.get(field)
+        if now is None or before is None:
+            continue
+        if now > before * (1 + tolerance) and now - before > min_delta:
+            problems.append(f"{label} {before:.3f}s -> {now:.3f}s")
+    if baseline.get("events") is not None and abs(current["events"] - baseline["events"]) > event_tolerance:
+        problems.append(f"events {baseline['events']} -> {current['events']}")
+    if baseline.get("agent_chain") and current["agent_chain"] != baseline["agent_chain"]:
+        problems.append(f"route {' → '.join(baseline['agent_chain'])} -> {' → '.join(current['agent_chain'])}")
+    return problems
+
+
+async def run(args) -> dict:
+    from my_runtime.replay import Cassette
+
+    report = {}
+    for path in find_cassettes(args.paths):
+        cassette = Cassette.load(path)
+        results = await replay_cassette(cassette, args.timeout)
+        report[os.path.basename(path)] = {"runs": results, "replay": cassette.summary(),
+                                          "diverged": cassette.misses + cassette.unused()}
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="cassette files or directories of *.replay.gz")
+    parser.add_argument("--speed", type=float, default=1.0, help="scale recorded timings (0 = no waiting)")
+    parser.add_argument("--baseline", help="JSON from an earlier --save to compare against")
+    parser.add_argument("--save", help="write this replay's results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="ignore slowdowns below this many seconds")
+    parser.add_argument("--event-tolerance", type=int, default=0, help="allowed change in stream events per run")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per run")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    # Everything is answered from cassettes, so placeholder credentials are enough
+    os.environ["REPLAY_MODE"] = "replay"
+    os.environ["REPLAY_SPEED"] = str(args.speed)
+    os.environ.setdefault("GEMINI_API_KEY", "replay")
+    os.environ.setdefault("GEMINI_BASE_URL", "http://replay.invalid/v1")
+    os.environ.setdefault("GEMINI_MODEL_NAME", "replay")
+    os.environ.setdefault("WEATHER_API_KEY", "replay")
+    from agents import set_tracing_disabled
+
+    set_tracing_disabled(True)
+    report = asyncio.run(run(args))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({name: entry["runs"] for name, entry in report.items()}, f, indent=2)
+
+    from my_runtime.replay import Cassette
+
+    regressions = 0
+    for name, entry in report.items():
+        if name in baseline:
+            expected = baseline[name]
+        else:
+            expected = Cassette.load(next(p for p in find_cassettes(args.paths) if os.path.basename(p) == name)).runs
+        for current, before in zip(entry["runs"], expected):
+            current["regressions"] = compare(current, before, args.tolerance, args.min_delta, args.event_tolerance)
+            regressions += bool(current["regressions"])
+
+    if args.json:
+        print(json.dumps({"cassettes": report, "regressions": regressions}, indent=2))
+        return 1 if regressions else 0
+
+    for name, entry in report.items():
+        print(f"📼 {name}: {entry['replay']}")
+        for current in entry["runs"]:
+            ttft = current["time_to_first_token"]
+            line = (f"   {current['duration']:>7.3f}s  ttft {ttft if ttft is None else round(ttft, 3)!s:>6}  "
+                    f"{current['events']:>4} events  {current['prompt'][:48]}")
+            print(line)
+            for problem in current.get("regressions", []):
+                print(f"      ⚠️  {problem}")
+        if entry["diverged"]:
+            print(f"   ↪ {entry['diverged']} recorded exchanges didn't line up with today's requests")
+    print(f"{'❌' if regressions else '✅'} {regressions} regressed run(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
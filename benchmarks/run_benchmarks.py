@@ -0,0 +1,227 @@
+"""Offline benchmarks of our own orchestration overhead against the local mock model server.
+
+    python benchmarks/run_benchmarks.py --first-token-ms 50 --token-ms 2 --json results.json
+    python benchmarks/run_benchmarks.py --compare results.json --tolerance 0.25
+
+Scenarios:
+  single       sequential single queries through the streaming loop (like main())
+  interactive  one multi-turn conversation with memory and sticky routing
+  batch        concurrent prompts through batch_runner.run_batch
+
+Reports end-to-end latency percentiles, stream events/sec and peak traced memory.
+With --compare, exits non-zero when a metric regresses past --tolerance.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import BackgroundMockServer, MockBehaviour, use_mock_endpoint  # noqa: E402
+
+SINGLE_PROMPTS = [
+    "I need help building a React component",
+    "What's the weather like in London?",
+    "I want to create a Python script for data analysis",
+    "Can you help me build a weather app with Next.js?",
+    "How do I calculate the area of a circle with radius 3?",
+]
+
+CONVERSATION = [
+    "I want to create a Python script for data analysis",
+    "Can you make it read a CSV file?",
+    "How would I plot the results?",
+    "Thanks! Also, what's the weather in Paris?",
+    "Should I bring an umbrella?",
+    "Now help me with a Next.js page to show those plots",
+]
+
+
+async def stream_run(starting_agent, run_input) -> dict:
+    """One streamed run, consumed the way main() does it, with output going to a buffer"""
+    from agents import Runner
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    from my_config.gemini_config import get_run_config
+    from my_runtime.streaming import StreamRenderer
+
+    renderer = StreamRenderer(out=io.StringIO())
+    started = time.perf_counter()
+    res = Runner.run_streamed(starting_agent=starting_agent, input=run_input, run_config=get_run_config())
+    events = 0
+    async for event in res.stream_events():
+        events += 1
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            renderer.write(event.data.delta)
+    renderer.finish()
+    return {
+        "latency": time.perf_counter() - started,
+        "ttft": renderer.time_to_first_token,
+        "events": events,
+        "result": res,
+    }
+
+
+async def scenario_single(iterations, force_triage):
+    from handoff_agent.main import pick_starting_agent, triage_agent
+
+    runs = []
+    for _ in range(iterations):
+        for prompt in SINGLE_PROMPTS:
+            agent = triage_agent if force_triage else pick_starting_agent(prompt)
+            runs.append(await stream_run(agent, prompt))
+    return runs
+
+
+async def scenario_interactive(iterations, force_triage):
+    from handoff_agent.main import pick_follow_up_agent, pick_starting_agent, triage_agent
+    from my_runtime.memory import ContextWindow, Session
+
+    runs = []
+    for i in range(iterations):
+        memory, window = Session(f"bench-{i}"), ContextWindow()
+        for prompt in CONVERSATION:
+            if force_triage:
+                agent = triage_agent
+            elif memory.last_agent:
+                agent, _ = pick_follow_up_agent(prompt, memory.last_agent)
+            else:
+                agent = pick_starting_agent(prompt)
+            run = await stream_run(agent, window.build_input(memory, prompt) if memory.has_history else prompt)
+            memory.add_turn(prompt, str(run["result"].final_output), run["result"].last_agent.name)
+            runs.append(run)
+    return runs
+
+
+async def scenario_batch(iterations, concurrency):
+    from batch_runner import read_prompts, run_batch
+
+    prompts = read_prompts(SINGLE_PROMPTS * iterations * 4)
+    records = []
+    await run_batch(prompts, concurrency=concurrency, on_result=records.append)
+    return [{"latency": r["latency"], "ttft": None, "events": 0, "error": r.get("error")} for r in records]
+
+
+def summarize(name, runs, elapsed, peak_bytes) -> dict:
+    from batch_runner import percentile
+
+    latencies = [run["latency"] for run in runs]
+    ttfts = [run["ttft"] for run in runs if run.get("ttft") is not None]
+    events = sum(run["events"] for run in runs)
+    return {
+        "scenario": name,
+        "runs": len(runs),
+        "errors": sum(1 for run in runs if run.get("error")),
+        "wall_time": elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "ttft_p50": percentile(ttfts, 50) if ttfts else None,
+        "events_per_sec": events / elapsed if events else None,
+        "runs_per_sec": len(runs) / elapsed if elapsed else 0.0,
+        "peak_memory_mb": peak_bytes / 1e6 if peak_bytes is not None else None,
+    }
+
+
+async def measure(name, coro, trace_memory) -> dict:
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    runs = await coro
+    elapsed = time.perf_counter() - started
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return summarize(name, runs, elapsed, peak)
+
+
+async def run_all(args) -> list:
+    from agents import set_tracing_disabled
+
+    set_tracing_disabled(True)
+    scenarios = {
+        "single": lambda: scenario_single(args.iterations, args.force_triage),
+        "interactive": lambda: scenario_interactive(args.iterations, args.force_triage),
+        "batch": lambda: scenario_batch(args.iterations, args.concurrency),
+    }
+    # Warm up imports, the model client and the connection pool outside the measurements
+    await scenario_single(1, args.force_triage)
+    return [await measure(name, scenarios[name](), not args.no_memory) for name in args.scenarios]
+
+
+def compare(results, baseline, tolerance) -> list:
+    """Names of metrics that got worse than baseline by more than `tolerance` (a fraction)"""
+    regressions = []
+    previous = {row["scenario"]: row for row in baseline}
+    for row in results:
+        old = previous.get(row["scenario"])
+        if not old:
+            continue
+        for metric, higher_is_better in (("p50", False), ("p95", False), ("events_per_sec", True), ("runs_per_sec", True)):
+            new_value, old_value = row.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{row['scenario']}.{metric}: {old_value:.4g} → {new_value:.4g} ({change:+.0%})")
+    return regressions
+
+
+def print_table(results):
+    print(f"\n{'scenario':<12}{'runs':>6}{'err':>5}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'ttft s':>9}{'events/s':>10}{'runs/s':>9}{'peak MB':>9}")
+    for row in results:
+        fmt = lambda value, spec: format(value, spec) if value is not None else "-"  # noqa: E731
+        print(
+            f"{row['scenario']:<12}{row['runs']:>6}{row['errors']:>5}{row['p50']:>9.3f}{row['p95']:>9.3f}"
+            f"{row['p99']:>9.3f}{fmt(row['ttft_p50'], '.3f'):>9}{fmt(row['events_per_sec'], '.0f'):>10}"
+            f"{row['runs_per_sec']:>9.2f}{fmt(row['peak_memory_mb'], '.1f'):>9}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", default=["single", "interactive", "batch"],
+                        choices=["single", "interactive", "batch"])
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8, help="batch scenario concurrency")
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--force-triage", action="store_true", help="always start at the triage agent")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it adds overhead)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    behaviour = MockBehaviour(args.first_token_ms, args.token_ms, args.answer_tokens)
+    with BackgroundMockServer(behaviour) as server:
+        use_mock_endpoint(server)
+        results = asyncio.run(run_all(args))
+        print(f"🧪 Mock server handled {behaviour.requests} model requests")
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Measure speculative specialist execution against plain triage handoffs on ambiguous prompts.
+
+    python benchmarks/speculative_report.py --mock --repeat 3 --candidates 2
+
+Each prompt needs triage (the local router is not confident). "baseline" streams the triage
+run as usual; "speculative" also starts the router's top candidates and keeps the one triage
+picks. Reported per mode: time to the first specialist token, total time, tokens billed to the
+run, and tokens spent on discarded speculative runs.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import Runner, set_tracing_disabled  # noqa: E402
+
+set_tracing_disabled(True)
+
+AMBIGUOUS_PROMPTS = [
+    "Can you help me build a weather app with Next.js?",
+    "I want a Python script that checks the weather every morning",
+    "How would I show a live temperature chart in my React component?",
+    "Write some code to compute the average rainfall for a city",
+    "Should I learn Python or JavaScript for a data dashboard?",
+]
+
+
+async def measure(make_run, prompt: str, triage_name: str, timeout: float) -> dict:
+    from my_runtime.speculative import speculation_stats
+
+    extra_before = speculation_stats.extra_tokens
+    started = time.perf_counter()
+    first_token = None
+    agent = triage_name
+    res = make_run(prompt)
+    try:
+        async with asyncio.timeout(timeout):
+            async for event in res.stream_events():
+                if event.type == "agent_updated_stream_event":
+                    agent = event.new_agent.name
+                elif (
+                    first_token is None
+                    and agent != triage_name
+                    and event.type == "raw_response_event"
+                    and getattr(event.data, "type", "") == "response.output_text.delta"
+                ):
+                    first_token = time.perf_counter() - started
+    except Exception as e:
+        res.cancel()
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "error": None,
+        "first_token": first_token,
+        "seconds": time.perf_counter() - started,
+        "tokens": res.context_wrapper.usage.total_tokens,
+        "extra_tokens": speculation_stats.extra_tokens - extra_before,
+        "final_agent": res.last_agent.name,
+    }
+
+
+async def run(args) -> dict:
+    from handoff_agent.main import specialists, triage_agent
+    from handoff_agent.router import score
+    from my_config.gemini_config import get_run_config
+    from my_runtime.speculative import SpeculativeRun, speculation_stats
+
+    def candidates(prompt):
+        ranked = sorted(score(prompt).items(), key=lambda item: item[1], reverse=True)
+        return [specialists[key] for key, value in ranked[: args.candidates] if value > 0]
+
+    modes = {
+        "baseline": lambda prompt: Runner.run_streamed(triage_agent, prompt, run_config=get_run_config()),
+        "speculative": lambda prompt: SpeculativeRun(
+            triage_agent, candidates(prompt), prompt, get_run_config(), args.max_tokens
+        ),
+    }
+    rows = {mode: [] for mode in modes}
+    for i in range(args.repeat):
+        for j, prompt in enumerate(AMBIGUOUS_PROMPTS):
+            # Alternate the order so neither mode always goes first
+            order = list(modes.items())[:: -1 if (i + j) % 2 else 1]
+            for mode, make_run in order:
+                rows[mode].append(await measure(make_run, prompt, triage_agent.name, args.timeout))
+    return {"rows": rows, "stats": speculation_stats}
+
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else 0.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the prompts")
+    parser.add_argument("--candidates", type=int, default=1, help="specialists started alongside triage")
+    parser.add_argument("--max-tokens", type=int, default=2000, help="cap on tokens spent by discarded runs")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per run")
+    parser.add_argument("--mock", action="store_true", help="run against the local mock model server")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="mock latency to first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="mock latency per token")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        if args.mock:
+            from mock_server import BackgroundMockServer, MockBehaviour, use_mock_endpoint
+
+            mock = stack.enter_context(BackgroundMockServer(MockBehaviour(args.first_token_ms, args.token_ms)))
+            use_mock_endpoint(mock)
+        result = asyncio.run(run(args))
+
+    report = {}
+    for mode, rows in result["rows"].items():
+        ok = [row for row in rows if not row["error"]]
+        report[mode] = {
+            "runs": len(rows),
+            "errors": [row["error"] for row in rows if row["error"]],
+            "first_token_p50": _median(row["first_token"] for row in ok),
+            "seconds_p50": _median(row["seconds"] for row in ok),
+            "tokens": sum(row["tokens"] for row in ok),
+            "extra_tokens": sum(row["extra_tokens"] for row in ok),
+        }
+    stats = result["stats"]
+    saved = report["baseline"]["first_token_p50"] - report["speculative"]["first_token_p50"]
+    extra = report["speculative"]["extra_tokens"] + report["speculative"]["tokens"] - report["baseline"]["tokens"]
+    if args.json:
+        print(json.dumps({"modes": report, "first_token_saved": saved, "extra_tokens": extra,
+                          "hits": stats.hits, "misses": stats.misses, "capped": stats.capped}, indent=2))
+        return 0
+
+    print(f"🏁 Speculative execution, {len(AMBIGUOUS_PROMPTS)} ambiguous prompts x {args.repeat}, "
+          f"{args.candidates} candidate(s)")
+    print(f"   {'mode':<13}{'1st token p50':>15}{'total p50':>11}{'run tok':>9}{'discarded':>11}{'err':>5}")
+    for mode, row in report.items():
+        print(f"   {mode:<13}{row['first_token_p50']:>15.3f}{row['seconds_p50']:>11.3f}{row['tokens']:>9}"
+              f"{row['extra_tokens']:>11}{len(row['errors']):>5}")
+        for error in row["errors"][:3]:
+            print(f"   ⚠️  {error}")
+    print(f"   Triage picked a speculated specialist {stats.hits}/{stats.runs} times ({stats.capped} capped)")
+    print(f"   First specialist token {saved * 1000:+.0f} ms sooner for {extra:+} tokens overall")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
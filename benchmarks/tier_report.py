@@ -0,0 +1,98 @@
+"""Compare model tiers on triage routing accuracy and answer latency.
+
+    python benchmarks/tier_report.py --tiers small large --repeat 3
+
+Every agent is put on one tier at a time. Routing starts each sample query at
+triage and stops at the handoff, the same check as prompt_ab.py. Answers run
+each query to completion on its expected specialist and measure latency and
+output tokens. Without MODEL_POOL, SMALL_MODEL_NAME decides what "small" means.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import Runner, set_tracing_disabled  # noqa: E402
+
+from batch_runner import percentile  # noqa: E402
+from handoff_agent.main import SAMPLE_QUERIES, build_agents  # noqa: E402
+from handoff_agent.prompts import TRIAGE  # noqa: E402
+from my_config.gemini_config import get_run_config  # noqa: E402
+from prompt_ab import route_once  # noqa: E402
+
+set_tracing_disabled(True)
+
+
+async def answer_once(agent, query: str, timeout: float) -> dict:
+    started = time.perf_counter()
+    try:
+        res = await asyncio.wait_for(Runner.run(agent, query, run_config=get_run_config()), timeout)
+    except Exception as e:
+        return {"seconds": time.perf_counter() - started, "output_tokens": 0, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "seconds": time.perf_counter() - started,
+        "output_tokens": res.context_wrapper.usage.output_tokens,
+        "error": None,
+    }
+
+
+async def evaluate(tier: str, repeat: int, timeout: float) -> dict:
+    agents = build_agents(tiers={key: tier for key in (TRIAGE, *{key for _, key in SAMPLE_QUERIES})})
+    routes, answers = [], []
+    for _ in range(repeat):
+        routed = await asyncio.gather(*(route_once(agents, query, timeout) for query, _ in SAMPLE_QUERIES))
+        for (query, key), (got, seconds) in zip(SAMPLE_QUERIES, routed):
+            routes.append({"query": query, "ok": got == agents[key].name, "seconds": seconds})
+        for query, key in SAMPLE_QUERIES:
+            answers.append(await answer_once(agents[key], query, timeout))
+
+    handoff_seconds = [row["seconds"] for row in routes]
+    answer_seconds = [row["seconds"] for row in answers if not row["error"]]
+    return {
+        "tier": tier,
+        "routed": sum(row["ok"] for row in routes),
+        "queries": len(routes),
+        "handoff_p50": percentile(handoff_seconds, 50),
+        "handoff_p95": percentile(handoff_seconds, 95),
+        "answer_p50": percentile(answer_seconds, 50),
+        "answer_p95": percentile(answer_seconds, 95),
+        "output_tokens": sum(row["output_tokens"] for row in answers),
+        "errors": [row["error"] for row in answers if row["error"]],
+    }
+
+
+async def run(tiers, repeat, timeout):
+    return [await evaluate(tier, repeat, timeout) for tier in tiers]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiers", nargs="+", default=["small", "large"])
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the sample queries per tier")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per run")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    reports = asyncio.run(run(args.tiers, args.repeat, args.timeout))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+
+    print(f"\n{'tier':<10}{'routed':>9}{'handoff p50':>13}{'p95':>8}{'answer p50':>12}{'p95':>8}{'out tok':>9}{'err':>5}")
+    for row in reports:
+        print(
+            f"{row['tier']:<10}{row['routed']:>4}/{row['queries']:<4}{row['handoff_p50']:>13.2f}{row['handoff_p95']:>8.2f}"
+            f"{row['answer_p50']:>12.2f}{row['answer_p95']:>8.2f}{row['output_tokens']:>9}{len(row['errors']):>5}"
+        )
+        for error in row["errors"][:3]:
+            print(f"   ⚠️  {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
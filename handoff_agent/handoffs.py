@@ -0,0 +1,89 @@
+import json
+from dataclasses import replace
+
+from agents import Handoff, HandoffCallItem, HandoffInputData, HandoffOutputItem, handoff
+from pydantic import BaseModel, Field
+
+
+class HandoffContext(BaseModel):
+    """What triage passes to the specialist in fast handoff mode, in place of a spoken explanation"""
+
+    intent: str = Field(description="The user's request restated in one short sentence")
+    cities: list[str] = Field(description="Places named in the request, empty if none")
+    numbers: list[str] = Field(description="Numbers or expressions from the request, verbatim")
+    details: list[str] = Field(description="Other key terms such as frameworks, libraries or file names")
+
+
+def _accept(ctx, context: HandoffContext) -> None:
+    # Validation against HandoffContext is the point; the payload travels in the call arguments
+    return None
+
+
+def payload_only(data: HandoffInputData) -> HandoffInputData:
+    """Forward the conversation and the handoff call (which carries the payload), nothing triage said"""
+
+    def keep(items):
+        return tuple(item for item in items if isinstance(item, (HandoffCallItem, HandoffOutputItem)))
+
+    return replace(data, pre_handoff_items=keep(data.pre_handoff_items), new_items=keep(data.new_items))
+
+
+class _PayloadOnly:
+    """payload_only as a fast handoff's input filter, holding the target agent the Handoff doesn't keep"""
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def __call__(self, data: HandoffInputData) -> HandoffInputData:
+        return payload_only(data)
+
+
+def fast_handoff(agent) -> Handoff:
+    """Handoff to `agent` whose tool takes a HandoffContext and drops triage's own messages"""
+    return handoff(agent, on_handoff=_accept, input_type=HandoffContext, input_filter=_PayloadOnly(agent))
+
+
+def handoff_targets(agent) -> dict:
+    """Handoff tool name -> name of the agent it transfers to"""
+    targets = {}
+    for target in agent.handoffs:
+        if isinstance(target, Handoff):
+            targets[target.tool_name] = target.agent_name
+        else:
+            targets[Handoff.default_tool_name(target)] = target.name
+    return targets
+
+
+def handoff_agents(agent) -> list:
+    """Agents `agent` can transfer to, whether listed directly or behind a fast handoff"""
+    agents = []
+    for target in agent.handoffs:
+        if isinstance(target, Handoff):
+            target = getattr(target.input_filter, "agent", None)
+            if target is None:
+                continue
+        agents.append(target)
+    return agents
+
+
+def handoff_payload(item) -> dict:
+    """Arguments of a handoff call item ({} for plain handoffs or unparsable JSON)"""
+    try:
+        payload = json.loads(getattr(item.raw_item, "arguments", "") or "{}")
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def describe_handoff(item, from_agent) -> tuple:
+    """(target agent name, one-line summary of the payload or None) for a handoff call item"""
+    tool_name = getattr(item.raw_item, "name", "")
+    target = handoff_targets(from_agent).get(tool_name, tool_name)
+    payload = handoff_payload(item)
+    if not payload:
+        return target, None
+    parts = [payload.get("intent", "")]
+    for key in ("cities", "numbers", "details"):
+        if payload.get(key):
+            parts.append(f"{key}: {', '.join(map(str, payload[key]))}")
+    return target, " | ".join(part for part in parts if part) or None
@@ -1,284 +1,162 @@
-from agents import Agent
-
-from my_tools.tools import (
-    add_numbers,
-    subtract,
-    multiply,
-    divide,
-    get_weather
-)
-
-# Enhanced Next.js Assistant
-next_js_assistant = Agent(
-    name="Next.js Assistant",
-    instructions="""You are an expert Next.js developer assistant specialized in:
-
-**Core Expertise:**
-- Next.js 14+ (App Router, Server Components, Client Components)
-- React 18+ (Hooks, Context, State Management)
-- TypeScript integration and best practices
-- Tailwind CSS and modern styling approaches
-- API Routes and Server Actions
-- Authentication (NextAuth.js, Auth0, Clerk)
-- Database integration (Prisma, Drizzle, MongoDB)
-- Deployment (Vercel, Netlify, AWS)
-
-**Best Practices:**
-- Always suggest TypeScript for new projects
-- Recommend App Router over Pages Router for new projects
-- Emphasize performance optimization (Image, Font, Bundle optimization)
-- Security best practices (CSRF, XSS, authentication)
-- SEO optimization and meta tags
-- Accessibility (a11y) considerations
-
-**Code Quality:**
-- Provide complete, working code examples
-- Include error handling and loading states
-- Suggest testing strategies (Jest, Cypress, Playwright)
-- Recommend proper folder structure and file organization
-- Include comments explaining complex logic
-
-**Communication Style:**
-- Ask clarifying questions about project requirements
-- Provide step-by-step implementation guides
-- Suggest alternative approaches when applicable
-- Include relevant documentation links
-- Warn about potential pitfalls and common mistakes
-
-Always format code with proper syntax highlighting and include installation commands for any dependencies.""",
-    # Lower temperature for more consistent code
-)
-
-# Enhanced Python Assistant
-python_assistant = Agent(
-    name="Python Assistant",
-    instructions="""You are a senior Python developer and data scientist with expertise in:
-
-**Core Python:**
-- Python 3.9+ features and best practices
-- Object-oriented programming and design patterns
-- Async/await and concurrent programming
-- Error handling and debugging techniques
-- Performance optimization and profiling
-
-**Web Development:**
-- FastAPI, Django, Flask frameworks
-- RESTful API design and GraphQL
-- Database integration (SQLAlchemy, Django ORM)
-- Authentication and authorization
-- Testing (pytest, unittest, mocking)
-
-**Data Science & AI:**
-- NumPy, Pandas, Matplotlib, Seaborn
-- Machine Learning (scikit-learn, TensorFlow, PyTorch)
-- Data analysis and visualization
-- Jupyter notebooks and data pipelines
-- Statistical analysis and modeling
-
-**DevOps & Tools:**
-- Virtual environments (venv, conda, poetry)
-- Package management and distribution
-- Docker containerization
-- CI/CD pipelines
-- Code quality tools (black, flake8, mypy)
-
-**Code Quality Standards:**
-- Write clean, readable, and maintainable code
-- Follow PEP 8 style guidelines
-- Include comprehensive docstrings
-- Implement proper error handling
-- Suggest type hints where appropriate
-- Provide unit tests when relevant
-
-**Communication Style:**
-- Explain complex concepts with simple examples
-- Break down problems into smaller, manageable steps
-- Suggest multiple approaches and explain trade-offs
-- Include performance considerations
-- Provide debugging tips and common pitfalls
-
-Always include installation commands, import statements, and complete working examples.""",
-)
-
-# Enhanced Math Assistant
-math_assistant = Agent(
-    name="Math Assistant",
-    instructions="""You are an expert mathematics tutor and computational assistant specializing in:
-
-**Mathematical Areas:**
-- Arithmetic and basic operations
-- Algebra and equation solving
-- Calculus (derivatives, integrals, limits)
-- Statistics and probability
-- Linear algebra and matrix operations
-- Discrete mathematics and combinatorics
-- Number theory and mathematical proofs
-
-**Problem-Solving Approach:**
-- Break complex problems into step-by-step solutions
-- Explain mathematical concepts clearly and intuitively
-- Provide multiple solution methods when applicable
-- Show work and reasoning for each step
-- Use visual aids and examples when helpful
-- Verify answers and check for reasonableness
-
-**Available Tools:**
-- Basic arithmetic operations (add, subtract, multiply, divide)
-- For complex calculations, use the provided math tools
-- Always show the calculation process, not just the result
-- Explain when and why to use specific mathematical operations
-
-**Teaching Style:**
-- Use clear, educational language
-- Provide real-world applications and examples
-- Encourage understanding over memorization
-- Identify and correct common mathematical errors
-- Suggest practice problems for skill improvement
-- Adapt explanations to different skill levels
-
-**Special Capabilities:**
-- Solve word problems by identifying key information
-- Create step-by-step solution guides
-- Explain mathematical notation and terminology
-- Help with homework and exam preparation
-- Provide mathematical proofs and logical reasoning
-
-When performing calculations, always use the available math tools and show your work clearly.""",
-    tools=[add_numbers, subtract, multiply, divide],
-)
-
-# Enhanced Weather Assistant
-weather_assistant = Agent(
-    name="Weather Assistant",
-    instructions="""You are a professional meteorologist and weather information specialist with expertise in:
-
-**Weather Services:**
-- Current weather conditions for any location worldwide
-- Weather forecasts and predictions
-- Climate data and historical weather patterns
-- Severe weather alerts and warnings
-- Agricultural and outdoor activity recommendations
-
-**Specialized Knowledge:**
-- Weather pattern interpretation and analysis
-- Climate science and meteorological phenomena
-- Seasonal variations and long-term trends
-- Weather impact on daily activities and travel
-- Regional climate characteristics
-
-**Communication Style:**
-- Provide accurate, up-to-date weather information
-- Explain weather phenomena in easy-to-understand terms
-- Include relevant details like temperature, humidity, wind, precipitation
-- Offer practical advice based on weather conditions
-- Warn about potentially dangerous weather situations
-
-**Additional Services:**
-- Travel weather recommendations
-- Outdoor activity planning (hiking, sports, events)
-- Agricultural weather advice
-- Weather-related safety tips
-- Historical weather data and comparisons
-
-**Data Presentation:**
-- Use clear, organized formatting for weather data
-- Include both metric and imperial units when relevant
-- Provide context for weather conditions (seasonal norms, etc.)
-- Suggest appropriate clothing and preparations
-- Include weather maps and visual descriptions when helpful
-
-Always use the weather tool to get current, accurate information rather than providing outdated or general weather data.""",
-    tools=[get_weather],
-)
-
-# Enhanced Triage Agent with Clear Handoff Messaging
-triage_agent = Agent(
-    name="Triage Agent",
-    instructions="""You are an intelligent routing assistant that helps users connect with the right specialist. Your role is to:
-
-**Primary Responsibilities:**
-1. **Greet and Assess:** Warmly welcome users and quickly understand their needs
-2. **Analyze Intent:** Determine which specialist can best help with their request
-3. **Explain Routing Decision:** ALWAYS clearly explain which agent is best suited and WHY
-4. **Route Efficiently:** Transfer to the appropriate assistant with clear context
-
-**Greeting Protocol:**
-- Introduce yourself as the Triage Agent
-- Briefly explain your role in connecting users with specialists
-- Ask clarifying questions if the request is ambiguous
-- Be friendly, professional, and efficient
-
-**CRITICAL: Always Explain Your Routing Decision**
-Before transferring, you MUST:
-1. **Acknowledge** the user's request clearly
-2. **Analyze** what type of expertise is needed
-3. **Explain** which specialist is best suited and why
-4. **Announce** the transfer with confidence
-
-**Routing Logic with Explanations:**
-
-🔸 **Next.js Assistant** - Choose when user needs help with:
-- Web development, React components, frontend architecture
-- Next.js features (routing, API routes, server components)
-- UI/UX, styling, Tailwind CSS
-- Deployment and performance optimization
-- *Example explanation: "I can see you need help with web development using Next.js. Our Next.js Assistant specializes in React, frontend architecture, and modern web development practices."*
-
-🔸 **Python Assistant** - Choose when user needs help with:
-- Python programming, scripting, automation
-- Data science, machine learning, AI
-- Backend development, APIs, databases
-- Data analysis, visualization, scientific computing
-- *Example explanation: "Your request involves Python programming and data processing. Our Python Assistant is expert in both development and data science applications."*
-
-🔸 **Math Assistant** - Choose when user needs help with:
-- Mathematical calculations, equations, formulas
-- Statistics, probability, data analysis
-- Academic math problems, homework
-- Mathematical concepts and explanations
-- *Example explanation: "This is a mathematical problem that requires calculations and explanations. Our Math Assistant specializes in solving mathematical problems step-by-step."*
-
-🔸 **Weather Assistant** - Choose when user needs help with:
-- Weather forecasts, current conditions
-- Climate information, weather patterns
-- Travel planning based on weather
-- Outdoor activity recommendations
-- *Example explanation: "You're asking about weather information. Our Weather Assistant can provide current conditions, forecasts, and weather-related advice."*
-
-**Handoff Process (MANDATORY FORMAT):**
-1. "I understand you need help with [brief description of request]"
-2. "Based on your request, I can see this involves [domain/expertise area]"
-3. "The best specialist for this is our **[Agent Name]** because [specific reason why this agent is perfect]"
-4. "🔄 **Transferring you to [Agent Name]** - they have the exact expertise you need for [specific capability]"
-5. Provide any relevant context to help the specialist
-
-**Example Handoff Messages:**
-- "I understand you need help with Next.js routing. This involves frontend web development and React navigation. The best specialist for this is our **Next.js Assistant** because they're expert in Next.js App Router, server components, and modern routing patterns. 🔄 **Transferring you to Next.js Assistant** - they have the exact expertise you need for Next.js routing implementation!"
-
-- "I see you want to calculate mathematical formulas. This requires step-by-step mathematical problem solving. The best specialist for this is our **Math Assistant** because they excel at breaking down complex calculations and explaining mathematical concepts clearly. 🔄 **Transferring you to Math Assistant** - they have the exact expertise you need for mathematical calculations and explanations!"
+from agents import Agent, ModelSettings
+
+from handoff_agent.handoffs import fast_handoff
+from handoff_agent.prompts import TRIAGE, render, render_fast_triage
+from handoff_agent.router import MATH, NEXT_JS, PYTHON, WEATHER, route, router_stats, score, topic_shift
+from my_config.gemini_config import get_model_settings
+from my_config.settings import get_settings
+import my_tools.tools  # noqa: F401  defines and registers every tool
+from my_tools.registry import registry
+
+def default_tiers() -> dict:
+    """Model tier per agent: small for triage and the tool agents, large for the code assistants"""
+    settings = get_settings()
+    return {
+        TRIAGE: settings.triage_model_tier,
+        NEXT_JS: settings.code_model_tier,
+        PYTHON: settings.code_model_tier,
+        MATH: settings.tool_model_tier,
+        WEATHER: settings.tool_model_tier,
+    }
+
+def build_agents(variant: str | None = None, tiers: dict | None = None, handoff_mode: str | None = None) -> dict:
+    """Create the triage agent and the specialists using the given instruction variant, model tiers and handoff mode"""
+    # `model` is a tier name resolved by the model pool (see my_config/model_pool.py)
+    tiers = {**default_tiers(), **(tiers or {})}
+    fast = (handoff_mode or get_settings().handoff_mode) == "fast"
+
+    # Enhanced Next.js Assistant
+    next_js_assistant = Agent(
+        name="Next.js Assistant",
+        instructions=render(NEXT_JS, variant),
+        model=tiers[NEXT_JS],
+        model_settings=get_model_settings(tiers[NEXT_JS]),
+        # Lower temperature for more consistent code
+    )
+
+    # Enhanced Python Assistant
+    python_assistant = Agent(
+        name="Python Assistant",
+        instructions=render(PYTHON, variant),
+        model=tiers[PYTHON],
+        model_settings=get_model_settings(tiers[PYTHON]),
+    )
+
+    # Enhanced Math Assistant
+    math_assistant = Agent(
+        name="Math Assistant",
+        instructions=render(MATH, variant),
+        model=tiers[MATH],
+        # Independent calls in one turn run concurrently and return in one round trip
+        model_settings=get_model_settings(tiers[MATH]).resolve(ModelSettings(parallel_tool_calls=True)),
+        tools=registry.select(tags=["math"]),
+    )
+
+    # Enhanced Weather Assistant
+    weather_assistant = Agent(
+        name="Weather Assistant",
+        instructions=render(WEATHER, variant),
+        model=tiers[WEATHER],
+        model_settings=get_model_settings(tiers[WEATHER]).resolve(ModelSettings(parallel_tool_calls=True)),
+        tools=registry.select(tags=["weather"]),
+    )
+
+    specialist_agents = [next_js_assistant, python_assistant, math_assistant, weather_assistant]
+    if fast:
+        # Fast mode: triage must call a transfer tool right away, passing a structured payload
+        triage_agent = Agent(
+            name="Triage Agent",
+            instructions=render_fast_triage(),
+            model=tiers[TRIAGE],
+            model_settings=get_model_settings(tiers[TRIAGE]).resolve(ModelSettings(tool_choice="required")),
+            handoffs=[fast_handoff(agent) for agent in specialist_agents],
+        )
+    else:
+        # Enhanced Triage Agent with Clear Handoff Messaging
+        triage_agent = Agent(
+            name="Triage Agent",
+            instructions=render(TRIAGE, variant),
+            model=tiers[TRIAGE],
+            model_settings=get_model_settings(tiers[TRIAGE]),
+            handoffs=specialist_agents,
+        )
+
+    return {
+        TRIAGE: triage_agent,
+        NEXT_JS: next_js_assistant,
+        PYTHON: python_assistant,
+        MATH: math_assistant,
+        WEATHER: weather_assistant,
+    }
+
+# Instructions come from handoff_agent/prompts.py (PROMPT_VARIANT selects full or compact)
+_agents = build_agents()
+triage_agent = _agents[TRIAGE]
+next_js_assistant = _agents[NEXT_JS]
+python_assistant = _agents[PYTHON]
+math_assistant = _agents[MATH]
+weather_assistant = _agents[WEATHER]
+
+# Sample queries with the specialist each one should reach
+SAMPLE_QUERIES = [
+    ("I need help building a React component", NEXT_JS),
+    ("How do I calculate the area of a circle?", MATH),
+    ("What's the weather like in New York?", WEATHER),
+    ("I want to create a Python script for data analysis", PYTHON),
+    ("Can you help me build a weather app with Next.js?", NEXT_JS),
+]
+
+# What the local router should do with each prompt: a specialist key, or None to defer to triage.
+# The mixed-domain ones name one domain as the subject of code in another and must not skip triage
+ROUTER_CASES = [
+    ("What's the weather like in New York?", WEATHER),
+    ("What is 15 * 25?", MATH),
+    ("I want to create a Python script for data analysis", PYTHON),
+    ("Write a python script that checks the weather forecast", None),
+    ("Write a function that fetches the temperature", None),
+    ("Build a Next.js page that shows the weather", None),
+    ("Write a python function to calculate the factorial of 10", None),
+]
+
+# Specialists reachable directly from the local fast-path router
+specialists = {
+    NEXT_JS: next_js_assistant,
+    PYTHON: python_assistant,
+    MATH: math_assistant,
+    WEATHER: weather_assistant,
+}
+
+def pick_starting_agent(prompt: str) -> Agent:
+    """Skip the triage round trip when the local router is confident, otherwise start at triage"""
+    decision = route(prompt)
+    return specialists.get(decision.specialist, triage_agent)
+
+def speculation_candidates(prompt: str) -> list:
+    """Specialists worth starting alongside triage (SPECULATIVE=1): the router's best one or two guesses"""
+    settings = get_settings()
+    if not settings.speculative:
+        return []
+    ranked = sorted(score(prompt).items(), key=lambda item: item[1], reverse=True)
+    return [
+        specialists[key] for key, value in ranked[: settings.speculative_candidates]
+        if value >= settings.speculative_min_score
+    ]
 
-**Edge Cases:**
-- If a request involves multiple domains, choose the PRIMARY domain and explain your reasoning
-- If unsure, ask clarifying questions before routing
-- For general questions, route to the most relevant specialist
-- Always explain your decision-making process
+def pick_follow_up_agent(prompt: str, last_agent_name: str | None):
+    """Stay with the previous specialist unless the topic clearly changed.
 
-**Communication Style:**
-- Be confident in your routing decisions
-- Use clear, professional language with enthusiasm
-- Show that you understand their needs
-- Make users feel they're getting connected to the perfect expert
-- Use emojis appropriately to enhance communication
+    Returns (agent, sticky) where sticky is True when a triage call was saved by staying.
+    """
+    decision = route(prompt)
+    if decision.fast_path:
+        return specialists[decision.specialist], False
 
-**Quality Assurance:**
-- NEVER transfer without explaining why that agent is the best choice
-- Always verify you understand the request correctly
-- Ensure users know exactly what expertise they're getting
-- Build confidence in the routing decision
+    last_key = next((key for key, agent in specialists.items() if agent.name == last_agent_name), None)
+    if last_key is not None and not topic_shift(decision.scores, last_key):
+        router_stats.sticky += 1
+        return specialists[last_key], True
 
-Remember: Your goal is to ensure every user understands WHY they're being connected with a specific expert and feels confident they're getting the right help.""",
-    handoffs=[next_js_assistant, python_assistant, math_assistant, weather_assistant],
-)
+    return triage_agent, False
 
 # Example usage and testing
 if __name__ == "__main__":
@@ -292,17 +170,16 @@ if __name__ == "__main__":
     print("- Weather Assistant")
     
     # Example interactions
-    test_queries = [
-        "I need help building a React component",
-        "How do I calculate the area of a circle?",
-        "What's the weather like in New York?",
-        "I want to create a Python script for data analysis",
-        "Can you help me build a weather app with Next.js?"
-    ]
+    test_queries = [query for query, _ in SAMPLE_QUERIES]
     
     print("\n📝 Example Queries:")
     for i, query in enumerate(test_queries, 1):
         print(f"{i}. {query}")
     
+    print("\n🧭 Local router checks:")
+    for query, expected in ROUTER_CASES:
+        routed = route(query, record=False).specialist
+        print(f"{'✅' if routed == expected else '❌'} {routed or 'triage':<8} {query}")
+
     print("\n🚀 System ready for user interactions!")
 
@@ -0,0 +1,131 @@
+import re
+from dataclasses import dataclass, field
+
+from my_config.settings import get_settings
+
+# Specialist keys, matching the agents exposed by handoff_agent.main
+NEXT_JS = "next_js"
+PYTHON = "python"
+MATH = "math"
+WEATHER = "weather"
+
+# (pattern, weight) pairs per specialist. Strong, unambiguous signals get a higher weight.
+_RULES = {
+    NEXT_JS: [
+        (r"\bnext\.?\s?js\b", 3.0),
+        (r"\b(app|pages) router\b", 3.0),
+        (r"\b(server|client) components?\b", 2.5),
+        (r"\b(react|jsx|tsx|vercel|tailwind)\b", 2.0),
+        (r"\b(frontend|front-end|usestate|useeffect|hooks?)\b", 1.5),
+        (r"\b(component|typescript|javascript|css|html|ui|website|web app|landing page)\b", 1.0),
+    ],
+    PYTHON: [
+        (r"\bpython\b", 3.0),
+        (r"\b(django|flask|fastapi|pandas|numpy|pytest|pip|venv|conda|jupyter|matplotlib|scikit-learn|pytorch|tensorflow)\b", 2.5),
+        (r"\w+\.py\b", 2.0),
+        (r"\b(dataframe|data analysis|machine learning|scrape|scraping|automation)\b", 1.5),
+        (r"\b(script|function|class|list|dict|decorator|module)\b", 0.5),
+    ],
+    MATH: [
+        # Bare arithmetic like "15 * 25" or "(3+4)/2"
+        (r"\d\s*[-+*/^×÷%]\s*\(?\s*\d", 3.0),
+        (r"\b(calculate|compute|evaluate|solve|simplify)\b", 2.0),
+        (r"\b(equation|integral|derivative|algebra|calculus|probability|statistics|matrix|factorial|percent(age)?|square root)\b", 2.0),
+        (r"\b(area|perimeter|volume|average|mean|median|sum|product|divided by|times|plus|minus)\b", 1.0),
+        (r"\bmath(s|ematics)?\b", 1.5),
+    ],
+    WEATHER: [
+        (r"\bweather\b", 3.0),
+        (r"\b(forecast|temperature|humidity)\b", 2.5),
+        (r"\b(rain(ing|y)?|snow(ing|y)?|sunny|cloudy|windy|storm|umbrella)\b", 2.0),
+        (r"\b(climate|hot|cold|degrees|celsius|fahrenheit)\b", 1.0),
+    ],
+}
+
+_COMPILED = {
+    key: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in rules]
+    for key, rules in _RULES.items()
+}
+
+
+@dataclass
+class RouteDecision:
+    specialist: str | None
+    confidence: float
+    scores: dict = field(default_factory=dict)
+
+    @property
+    def fast_path(self) -> bool:
+        return self.specialist is not None
+
+
+@dataclass
+class RouterStats:
+    total: int = 0
+    fast_path: int = 0
+    fallback: int = 0
+    sticky: int = 0
+    by_specialist: dict = field(default_factory=dict)
+
+    def record(self, decision: RouteDecision) -> None:
+        self.total += 1
+        if decision.fast_path:
+            self.fast_path += 1
+            self.by_specialist[decision.specialist] = self.by_specialist.get(decision.specialist, 0) + 1
+        else:
+            self.fallback += 1
+
+    @property
+    def fast_path_rate(self) -> float:
+        return self.fast_path / self.total if self.total else 0.0
+
+    def summary(self) -> str:
+        routed = ", ".join(f"{name}: {count}" for name, count in sorted(self.by_specialist.items()))
+        return (
+            f"Fast path {self.fast_path}/{self.total} ({self.fast_path_rate:.0%})"
+            + (f" [{routed}]" if routed else "")
+            + (f", sticky follow-ups {self.sticky}" if self.sticky else "")
+        )
+
+
+router_stats = RouterStats()
+
+
+def score(prompt: str) -> dict:
+    """Score the prompt against every specialist's domain"""
+    scores = {}
+    for key, rules in _COMPILED.items():
+        total = 0.0
+        for pattern, weight in rules:
+            if pattern.search(prompt):
+                total += weight
+        scores[key] = total
+    return scores
+
+
+def route(prompt: str, record: bool = True) -> RouteDecision:
+    """Pick a specialist when the prompt clearly belongs to one domain, otherwise defer to triage"""
+    scores = score(prompt)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+
+    # A prompt needs enough evidence, and a clear lead over the runner-up, to skip triage.
+    # The lead must grow with the runner-up's score: a second domain means a mixed request
+    settings = get_settings()
+    confident = (
+        best_score >= settings.router_min_score
+        and best_score - runner_up >= settings.router_min_margin + settings.router_mixed_margin * runner_up
+    )
+    confidence = (best_score - runner_up) / best_score if best_score else 0.0
+    decision = RouteDecision(best if confident else None, confidence, scores)
+
+    if record:
+        router_stats.record(decision)
+    return decision
+
+
+def topic_shift(scores: dict, current: str) -> bool:
+    """True when another specialist's domain clearly outscores the one we are talking to"""
+    settings = get_settings()
+    other = max(score for key, score in scores.items() if key != current)
+    return other >= settings.router_min_score and other - scores.get(current, 0.0) >= settings.router_min_margin
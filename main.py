@@ -1,8 +1,22 @@
-from agents import Runner, set_tracing_disabled
-from handoff_agent.main import triage_agent
+from agents import set_tracing_disabled
+from handoff_agent.main import triage_agent, pick_starting_agent, pick_follow_up_agent, speculation_candidates
+from handoff_agent.handoffs import describe_handoff
+from handoff_agent.router import router_stats
+from my_tools.calculator import evaluate_prompt
+from batch_runner import run_batch, read_prompts, print_summary
 import asyncio
+from openai import RateLimitError
 from openai.types.responses import ResponseTextDeltaEvent
-from my_config.gemini_config import run_config
+from my_config.gemini_config import get_model_pool, get_run_config
+from my_config.settings import get_settings
+from my_cache.response_cache import get_response_cache
+from my_runtime.streaming import StreamRenderer
+from my_runtime.metrics import start_run
+from my_runtime.profiling import profiled, read_input
+from my_runtime.speculative import run_streamed, speculation_stats
+from my_runtime.rate_limit import retry_after
+from my_runtime.memory import get_context_window, get_session_store, new_session_id
+import sys
 
 # Disable tracing for cleaner output
 set_tracing_disabled(True)
@@ -12,8 +26,9 @@ async def main():
     print("🤖 Welcome to the Multi-Agent Assistant!")
     print("=" * 50)
     
+    tracker = None
     try:
-        prompt = input("💬 Enter your prompt: ")
+        prompt = read_input("💬 Enter your prompt: ")
         
         if not prompt.strip():
             print("❌ Please enter a valid prompt")
@@ -22,55 +37,95 @@ async def main():
         print(f"\n🔍 Processing your request: \"{prompt}\"")
         print("-" * 50)
         
+        # Pure arithmetic is answered locally without calling the model
+        local_answer = evaluate_prompt(prompt)
+        if local_answer:
+            expression, value = local_answer
+            print(f"🧮 Calculator: {expression} = {value}")
+            return
+        
+        # Route locally when the prompt clearly belongs to one specialist
+        starting_agent = pick_starting_agent(prompt)
+        fast_routed = starting_agent is not triage_agent
+        if fast_routed:
+            print(f"⚡ Fast route: {starting_agent.name} (triage skipped)")
+        
+        # Opt-in cache of whole runs (RESPONSE_CACHE=memory|sqlite)
+        response_cache = get_response_cache()
+        cached = response_cache.lookup(prompt, starting_agent) if response_cache else None
+        if cached:
+            if "matched_prompt" in cached:
+                print(f"🔎 Near duplicate of \"{cached['matched_prompt']}\" (similarity {cached['similarity']:.2f})")
+            print(f"💾 Cached answer from {cached['final_agent']}:\n{cached['output']}")
+            return
+        
+        # Per-run timing export (METRICS_FILE); None when turned off
+        tracker = start_run(prompt, starting_agent.name)
+        
+        # Optionally start the likely specialists while triage decides (SPECULATIVE=1)
+        candidates = speculation_candidates(prompt) if starting_agent is triage_agent else []
+        if candidates:
+            print(f"🏁 Speculating: {', '.join(agent.name for agent in candidates)}")
+        
         # Start the streaming runner
-        res = Runner.run_streamed(
-            starting_agent=triage_agent, 
-            input=prompt,
-            run_config=run_config
+        res = run_streamed(
+            starting_agent, prompt, get_run_config(), candidates, get_settings().speculative_max_tokens
         )
         
-        current_agent = "Triage Agent"
-        response_text = ""
+        current_agent = starting_agent.name
         handoff_occurred = False
+        renderer = StreamRenderer()
         
-        print(f"🤖 {current_agent}: ", end="", flush=True)
+        renderer.echo(f"🤖 {current_agent}: ", end="")
         
         async for event in res.stream_events():
+            if tracker:
+                tracker.observe(event)
+            
             # Handle agent handoffs
-            if event.type == "agent_handoff_event":
+            if event.type == "run_item_stream_event" and event.item.type == "handoff_call_item":
+                # The transfer message is rendered here, not generated by triage
                 handoff_occurred = True
-                new_agent = event.data.to_agent.name
-                print(f"\n\n🔄 **HANDOFF DETECTED**")
-                print(f"   From: {current_agent}")
-                print(f"   To: {new_agent}")
-                print(f"   Reason: Specialized expertise required")
-                print("-" * 50)
-                print(f"🤖 {new_agent}: ", end="", flush=True)
+                new_agent, context = describe_handoff(event.item, triage_agent)
+                renderer.echo(f"\n\n🔄 **HANDOFF DETECTED**")
+                renderer.echo(f"   From: {current_agent}")
+                renderer.echo(f"   To: {new_agent}")
+                renderer.echo(f"   Reason: {context or 'Specialized expertise required'}")
+                renderer.echo("-" * 50)
+                renderer.echo(f"🤖 {new_agent}: ", end="")
                 current_agent = new_agent
             
             # Handle text streaming
             elif event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
-                delta = event.data.delta
-                print(delta, end="", flush=True)
-                response_text += delta
+                renderer.write(event.data.delta)
             
             # Handle tool calls (for math and weather operations)
-            elif event.type == "tool_call_event":
-                tool_name = getattr(event.data, 'tool_name', 'Unknown Tool')
-                print(f"\n🔧 Using tool: {tool_name}")
-                print("   ", end="", flush=True)
+            elif event.type == "run_item_stream_event" and event.item.type == "tool_call_item":
+                tool_name = getattr(event.item.raw_item, 'name', 'Unknown Tool')
+                renderer.echo(f"\n🔧 Using tool: {tool_name}")
+                renderer.echo("   ", end="")
             
             # Handle tool results
-            elif event.type == "tool_result_event":
-                print("✅ Tool completed")
-                print(f"🤖 {current_agent}: ", end="", flush=True)
+            elif event.type == "run_item_stream_event" and event.item.type == "tool_call_output_item":
+                renderer.echo("✅ Tool completed")
+                renderer.echo(f"🤖 {current_agent}: ", end="")
+        
+        renderer.finish()
+        if tracker:
+            tracker.finish(res)
+        
+        if response_cache:
+            response_cache.save(prompt, starting_agent, res.final_output, res.last_agent)
         
         # Final summary
         print(f"\n\n" + "=" * 50)
         print(f"✅ **Response Completed**")
         print(f"   Final Agent: {current_agent}")
-        print(f"   Response Length: {len(response_text)} characters")
-        if handoff_occurred:
+        print(f"   Response Length: {renderer.chars} characters")
+        print(f"   Streaming: {renderer.stats_line()}")
+        if fast_routed:
+            print(f"   Handoffs: ⚡ Routed locally to specialist")
+        elif handoff_occurred:
             print(f"   Handoffs: ✅ Routed to specialist")
         else:
             print(f"   Handoffs: ❌ Handled by triage agent")
@@ -78,7 +133,13 @@ async def main():
         
     except KeyboardInterrupt:
         print(f"\n\n⚠️  Session interrupted by user")
+    except RateLimitError as e:
+        if tracker:
+            tracker.finish(error=e)
+        print(f"\n⏳ The model endpoint is rate limiting us; try again in {retry_after(e, 10):.0f}s")
     except Exception as e:
+        if tracker:
+            tracker.finish(error=e)
         print(f"\n❌ Error occurred: {e}")
         import traceback
         traceback.print_exc()
@@ -86,18 +147,36 @@ async def main():
 async def interactive_session():
     """Interactive chat session with multiple queries"""
     print("🤖 Multi-Agent Assistant - Interactive Mode")
-    print("Commands: 'quit'/'exit' to stop, 'clear' to clear screen")
+    print("Commands: 'quit'/'exit' to stop, 'clear' to clear screen, 'reset' to forget the conversation")
     print("=" * 50)
     
     session_count = 0
+    renderer = StreamRenderer()
+    
+    # Conversation memory: recent turns verbatim, older ones summarized, within a token budget
+    session_store = get_session_store()
+    memory = session_store.load(new_session_id())
+    context_window = get_context_window()
+    triage_calls_saved = 0
+    print(f"🧠 Conversation: {memory.session_id} ({len(memory.turns)} recent turns restored)")
     
     while True:
+        tracker = None
         try:
             session_count += 1
             print(f"\n💬 Session #{session_count}")
-            prompt = input("You: ")
+            prompt = read_input("You: ")
             
             if prompt.lower() in ['quit', 'exit', 'q']:
+                print(f"⚡ Router: {router_stats.summary()}")
+                print(f"📌 Triage calls saved by sticky routing: {triage_calls_saved}")
+                if speculation_stats.runs:
+                    print(f"🏁 {speculation_stats.summary()}")
+                print(f"🔀 {get_model_pool().summary()}")
+                for limiter in get_model_pool().limiters():
+                    print(f"⏳ {limiter.summary()}")
+                if get_response_cache():
+                    print(f"💾 {get_response_cache().summary()}")
                 print("👋 Thank you for using the Multi-Agent Assistant!")
                 break
             elif prompt.lower() == 'clear':
@@ -105,6 +184,11 @@ async def interactive_session():
                 os.system('cls' if os.name == 'nt' else 'clear')
                 session_count = 0
                 continue
+            elif prompt.lower() == 'reset':
+                memory.clear()
+                session_store.save(memory)
+                print("🧠 Conversation memory cleared")
+                continue
             elif not prompt.strip():
                 print("❌ Please enter a valid prompt")
                 continue
@@ -112,44 +196,106 @@ async def interactive_session():
             print(f"\n🔍 Analyzing: \"{prompt}\"")
             print("-" * 30)
             
-            res = Runner.run_streamed(
-                starting_agent=triage_agent,
-                input=prompt,
-                run_config=run_config
+            local_answer = evaluate_prompt(prompt)
+            if local_answer:
+                expression, value = local_answer
+                print(f"🧮 Calculator: {expression} = {value}")
+                memory.add_turn(prompt, f"{expression} = {value}", None)
+                session_store.save(memory)
+                continue
+            
+            # Follow-ups stay with the last specialist unless the topic changed
+            sticky = False
+            if get_settings().sticky_routing and memory.last_agent:
+                starting_agent, sticky = pick_follow_up_agent(prompt, memory.last_agent)
+            else:
+                starting_agent = pick_starting_agent(prompt)
+            if sticky:
+                triage_calls_saved += 1
+                print(f"📌 Continuing with {starting_agent.name} (same topic, triage skipped)")
+            elif starting_agent is not triage_agent:
+                print(f"⚡ Fast route: {starting_agent.name} (triage skipped)")
+            
+            # Cached answers only apply to context-free prompts
+            response_cache = None if memory.has_history else get_response_cache()
+            cached = response_cache.lookup(prompt, starting_agent) if response_cache else None
+            if cached:
+                if "matched_prompt" in cached:
+                    print(f"🔎 Near duplicate of \"{cached['matched_prompt']}\" (similarity {cached['similarity']:.2f})")
+                print(f"💾 {cached['final_agent']} (cached): {cached['output']}")
+                memory.add_turn(prompt, cached['output'], cached['final_agent'])
+                session_store.save(memory)
+                continue
+            
+            tracker = start_run(prompt, starting_agent.name)
+            
+            candidates = speculation_candidates(prompt) if starting_agent is triage_agent else []
+            res = run_streamed(
+                starting_agent,
+                context_window.build_input(memory, prompt) if memory.has_history else prompt,
+                get_run_config(),
+                candidates,
+                get_settings().speculative_max_tokens,
             )
             
-            current_agent = "Triage Agent"
+            current_agent = starting_agent.name
             handoff_count = 0
+            renderer.reset()
             
-            print(f"🤖 {current_agent}: ", end="", flush=True)
+            renderer.echo(f"🤖 {current_agent}: ", end="")
             
             async for event in res.stream_events():
-                if event.type == "agent_handoff_event":
+                if tracker:
+                    tracker.observe(event)
+                
+                if event.type == "run_item_stream_event" and event.item.type == "handoff_call_item":
                     handoff_count += 1
-                    new_agent = event.data.to_agent.name
-                    print(f"\n\n🔄 Handoff #{handoff_count}: {current_agent} → {new_agent}")
-                    print("-" * 30)
-                    print(f"🤖 {new_agent}: ", end="", flush=True)
+                    new_agent, context = describe_handoff(event.item, triage_agent)
+                    renderer.echo(f"\n\n🔄 Handoff #{handoff_count}: {current_agent} → {new_agent}")
+                    if context:
+                        renderer.echo(f"   {context}")
+                    renderer.echo("-" * 30)
+                    renderer.echo(f"🤖 {new_agent}: ", end="")
                     current_agent = new_agent
                 
                 elif event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
-                    print(event.data.delta, end="", flush=True)
+                    renderer.write(event.data.delta)
+                
+                elif event.type == "run_item_stream_event" and event.item.type == "tool_call_item":
+                    tool_name = getattr(event.item.raw_item, 'name', 'Unknown')
+                    renderer.echo(f"\n🔧 {tool_name}: ", end="")
                 
-                elif event.type == "tool_call_event":
-                    tool_name = getattr(event.data, 'tool_name', 'Unknown')
-                    print(f"\n🔧 {tool_name}: ", end="", flush=True)
+                elif event.type == "run_item_stream_event" and event.item.type == "tool_call_output_item":
+                    renderer.echo(str(event.item.output)[:200])
+                    renderer.echo(f"🤖 {current_agent}: ", end="")
             
-            print(f"\n✅ Completed by {current_agent}")
+            renderer.finish()
+            if tracker:
+                tracker.finish(res)
+            
+            if response_cache:
+                response_cache.save(prompt, starting_agent, res.final_output, res.last_agent)
+            
+            memory.add_turn(prompt, str(res.final_output), res.last_agent.name)
+            session_store.save(memory)
+            
+            print(f"\n✅ Completed by {current_agent} ({renderer.stats_line()})")
             
         except KeyboardInterrupt:
             print(f"\n👋 Session ended by user")
             break
+        except RateLimitError as e:
+            if tracker:
+                tracker.finish(error=e)
+            print(f"\n⏳ Rate limited by the model endpoint; wait {retry_after(e, 10):.0f}s and ask again")
         except Exception as e:
+            if tracker:
+                tracker.finish(error=e)
             print(f"\n❌ Error in session #{session_count}: {e}")
 
-def run_sync_demo():
-    """Demo of synchronous execution for comparison"""
-    print("🔄 Running synchronous demo...")
+async def run_batch_demo():
+    """Demo of concurrent batch execution (see batch_runner.py for file/stdin input)"""
+    print("🔄 Running batch demo...")
     
     test_queries = [
         "Help me with Next.js routing",
@@ -158,22 +304,16 @@ def run_sync_demo():
         "Create a Python function to sort a list"
     ]
     
-    for i, query in enumerate(test_queries, 1):
-        print(f"\n📝 Test {i}: {query}")
+    def show(record):
+        print(f"\n📝 Test {record['id']}: {record['prompt']} ({record['latency']:.2f}s)")
         print("-" * 40)
-        
-        try:
-            result = Runner.run_sync(
-                starting_agent=triage_agent,
-                input=query,
-                run_config=run_config
-            )
-            
-            print(f"✅ Result: {getattr(result, 'output', str(result))[:100]}...")
-            # Handoff count not available in RunResult
-            
-        except Exception as e:
-            print(f"❌ Error: {e}")
+        if "error" in record:
+            print(f"❌ Error: {record['error']}")
+        else:
+            print(f"✅ {record['final_agent']}: {record['output'][:100]}...")
+    
+    summary = await run_batch(read_prompts(test_queries), on_result=show)
+    print_summary(summary)
 
 # Main execution
 if __name__ == "__main__":
@@ -181,18 +321,21 @@ if __name__ == "__main__":
     print("\nChoose execution mode:")
     print("1. Single Query (default)")
     print("2. Interactive Session")
-    print("3. Sync Demo")
+    print("3. Batch Demo")
+    
+    # --profile (or PROFILE=1) reports event-loop stalls, sampled stacks and per-agent/tool time
+    profile = True if "--profile" in sys.argv[1:] else None
     
     try:
         choice = input("\nEnter choice (1-3, or press Enter for 1): ").strip()
         
         if choice == "2":
-            asyncio.run(interactive_session())
+            asyncio.run(profiled(interactive_session(), profile))
         elif choice == "3":
-            run_sync_demo()
+            asyncio.run(profiled(run_batch_demo(), profile))
         else:
             # Default: single query mode
-            asyncio.run(main())
+            asyncio.run(profiled(main(), profile))
             
     except KeyboardInterrupt:
         print("\n👋 Startup cancelled by user")
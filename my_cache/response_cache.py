@@ -0,0 +1,210 @@
+import atexit
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from handoff_agent.handoffs import handoff_agents
+from my_config.gemini_config import model_identity
+from my_config.settings import get_settings
+
+# Answers produced by agents holding any of these tools go stale quickly
+VOLATILE_TOOLS = {"get_weather", "get_weather_many"}
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"\s+", " ", prompt).strip().lower().rstrip("?!. ")
+
+
+def _agent_fingerprint(agent, seen=None) -> list:
+    """Name, instructions, resolved model and settings of the agent and everything it can hand off to"""
+    seen = set() if seen is None else seen
+    if id(agent) in seen:
+        return []
+    seen.add(id(agent))
+    parts = [agent.name, str(agent.instructions), model_identity(agent)]
+    for target in handoff_agents(agent):
+        parts.extend(_agent_fingerprint(target, seen))
+    return parts
+
+
+def cache_key(prompt: str, agent, model_name: str | None) -> str:
+    instructions_hash = hashlib.sha256("\x00".join(_agent_fingerprint(agent)).encode()).hexdigest()
+    raw = json.dumps([normalize_prompt(prompt), agent.name, model_name, instructions_hash])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class MemoryStore:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteStore:
+    """On-disk store so cached answers survive restarts"""
+
+    def __init__(self, path: str, maxsize: int = 10_000):
+        self.path = path
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            # Purge expired rows, then trim least recently used ones past the size bound
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    """Caches final answers of whole agent runs"""
+
+    def __init__(
+        self,
+        store,
+        ttl: float = 86400.0,
+        volatile_ttl: float = 300.0,
+        model_name: str | None = None,
+        semantic=None,
+    ):
+        self.store = store
+        self.ttl = ttl
+        self.volatile_ttl = volatile_ttl
+        self.model_name = model_name
+        # Optional SemanticCache consulted when the exact key misses
+        self.semantic = semantic
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, final_agent) -> float:
+        """Tool-dependent answers (e.g. live weather) expire sooner than static ones"""
+        tool_names = {getattr(tool, "name", None) for tool in getattr(final_agent, "tools", [])}
+        return self.volatile_ttl if tool_names & VOLATILE_TOOLS else self.ttl
+
+    def lookup(self, prompt: str, agent):
+        """Return {"output", "final_agent"} for a cached run, or None"""
+        value = self.store.get(cache_key(prompt, agent, self.model_name))
+        if value is None and self.semantic is not None:
+            value = self.semantic.lookup(prompt, agent, self.model_name)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def save(self, prompt: str, agent, output, final_agent) -> None:
+        if output is None:
+            return
+        value = {"output": str(output), "final_agent": final_agent.name}
+        ttl = self.ttl_for(final_agent)
+        self.store.set(cache_key(prompt, agent, self.model_name), value, ttl)
+        if self.semantic is not None:
+            self.semantic.add(prompt, final_agent, value["output"], ttl, self.model_name)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        text = f"Cache {self.hits}/{total} hits ({rate:.0%})"
+        if self.semantic is not None:
+            text += f"; {self.semantic.summary()}"
+        return text
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """Return the configured response cache, or None when RESPONSE_CACHE is off (the default)"""
+    global _response_cache
+    settings = get_settings()
+    if settings.response_cache == "off":
+        return None
+    if _response_cache is None:
+        if settings.response_cache == "sqlite":
+            store = SQLiteStore(settings.response_cache_path, settings.response_cache_size)
+        else:
+            store = MemoryStore(settings.response_cache_size)
+        _response_cache = ResponseCache(
+            store,
+            ttl=settings.response_cache_ttl,
+            volatile_ttl=settings.response_cache_volatile_ttl,
+            model_name=settings.gemini_model_name,
+            semantic=_build_semantic_cache(settings) if settings.semantic_cache else None,
+        )
+    return _response_cache
+
+
+def _build_semantic_cache(settings):
+    # NumPy is only imported when the semantic layer is switched on
+    from my_cache.semantic_cache import SemanticCache
+
+    thresholds = json.loads(settings.semantic_cache_thresholds) if settings.semantic_cache_thresholds else {}
+    cache = SemanticCache(
+        path=settings.semantic_cache_path or None,
+        capacity=settings.semantic_cache_size,
+        dim=settings.semantic_cache_dim,
+        threshold=settings.semantic_cache_threshold,
+        thresholds=thresholds,
+        top_k=settings.semantic_cache_top_k,
+    )
+    # Inserts between periodic writes would otherwise be lost on exit
+    atexit.register(cache.flush)
+    return cache
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from handoff_agent.handoffs import handoff_agents
+from my_cache.response_cache import normalize_prompt
+from my_config.gemini_config import model_identity
+from my_tools.weather_cache import CITY_ALIASES
+
+# Bump when the vector features or the sidecar layout change; older files are discarded
+_FORMAT = 2
+
+# Filler that says nothing about what was asked; dropped before hashing
+_STOP_WORDS = frozenset(
+    "a about an and any are at be can could currently do does for give how i im in is it its "
+    "just know like me my now of on please right s so tell that the there this to today what "
+    "whats would you".split()
+)
+_WORD = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_PROPER = re.compile(r"(?<![.!?]\s)(?<!^)\b[A-Z][A-Za-z]+\b")
+# Lower-case prompts have no capitals to go on, so the object of "in/at/for" stands in for a place
+_PLACE = re.compile(r"\b(?:in|at|for) ([a-z]+(?: [a-z]+)?)")
+_ALIAS = re.compile(r"\b(" + "|".join(sorted(map(re.escape, CITY_ALIASES), key=len, reverse=True)) + r")\b")
+
+
+def _expand_aliases(text: str) -> str:
+    """Spell out city nicknames (lower-case input) so "nyc" and "new york" share features"""
+    return _ALIAS.sub(lambda m: CITY_ALIASES[m.group(1)], text)
+
+
+def prompt_entities(prompt: str) -> tuple:
+    """Numbers and proper nouns of a prompt, which must agree for two prompts to share an answer"""
+    numbers = sorted(set(_NUMBER.findall(prompt)))
+    names = " ".join(_PROPER.findall(prompt)).lower()
+    # Upper-case nicknames such as "NYC" count as names too
+    names += " " + " ".join(m.lower() for m in re.findall(r"\b[A-Z]{2,4}\b", prompt) if m.lower() in CITY_ALIASES)
+    names += " " + " ".join(_PLACE.findall(_expand_aliases(normalize_prompt(prompt))))
+    words = sorted(set(_expand_aliases(names).split()) - _STOP_WORDS)
+    return numbers, words
+
+
+class HashedNgramVectorizer:
+    """Word, word-bigram and character n-gram features hashed into a fixed-size float32 vector.
+
+    Term weights are sublinear TF times a smoothed IDF learnt from the stored prompts, so
+    words every prompt shares count for less as the cache fills up. Stored prompts keep only
+    their term frequencies and are weighted with the current IDF when compared.
+    """
+
+    def __init__(self, dim: int = 1024, ngram_range: tuple = (3, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.df = np.zeros(dim, dtype=np.float32)
+        self.documents = 0
+
+    def terms(self, prompt: str) -> list:
+        words = [w for w in _WORD.findall(_expand_aliases(normalize_prompt(prompt))) if w not in _STOP_WORDS]
+        terms = [f"w:{w}" for w in words]
+        terms += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        low, high = self.ngram_range
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                terms += [padded[i:i + n] for i in range(len(padded) - n + 1)]
+        return terms
+
+    def _hashed(self, prompt: str) -> tuple:
+        counts = Counter(self.terms(prompt))
+        hashes = np.fromiter((zlib.crc32(term.encode()) for term in counts), dtype=np.uint32, count=len(counts))
+        weights = np.fromiter((1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+        # Signed hashing: colliding terms tend to cancel instead of piling up
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+        return (hashes % self.dim).astype(np.intp), weights * signs
+
+    def idf(self) -> np.ndarray:
+        return np.log((1.0 + self.documents) / (1.0 + self.df)).astype(np.float32) + 1.0
+
+    def frequencies(self, prompt: str) -> np.ndarray:
+        """Signed term frequencies of the prompt, before IDF (all zeros when nothing is left after filtering)"""
+        index, weights = self._hashed(prompt)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        np.add.at(vector, index, weights)
+        return vector
+
+    def weigh(self, frequencies: np.ndarray) -> np.ndarray:
+        """Unit-length IDF-weighted vector from `frequencies`"""
+        vector = frequencies * self.idf()
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def transform(self, prompt: str) -> np.ndarray:
+        return self.weigh(self.frequencies(prompt))
+
+    def learn(self, prompt: str) -> None:
+        index, _ = self._hashed(prompt)
+        self.df[np.unique(index)] += 1.0
+        self.documents += 1
+
+
+def agent_key(agent, model_name: str | None) -> str:
+    """Identity of one agent's behaviour: a stored answer is reusable while this is unchanged"""
+    raw = json.dumps([agent.name, str(agent.instructions), model_name, model_identity(agent)])
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def reachable_keys(agent, model_name: str | None, seen=None) -> set:
+    """Keys of the agent and everything it can hand off to"""
+    seen = set() if seen is None else seen
+    if id(agent) in seen:
+        return set()
+    seen.add(id(agent))
+    keys = {agent_key(agent, model_name)}
+    for target in handoff_agents(agent):
+        keys |= reachable_keys(target, model_name, seen)
+    return keys
+
+
+class SemanticCache:
+    """Near-duplicate prompt lookup over a float32 matrix of prompt vectors.
+
+    A stored answer is served when its prompt is within the cosine threshold of the final
+    specialist that wrote it, that specialist is reachable from the starting agent, and the
+    two prompts name the same numbers and places. Rows are reused least recently used first.
+    With a path, term frequencies live in a memory-mapped .npy file and row metadata in a JSON sidecar.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        capacity: int = 2048,
+        dim: int = 1024,
+        threshold: float = 0.85,
+        thresholds: dict | None = None,
+        top_k: int = 5,
+        flush_interval: float = 5.0,
+    ):
+        self.path = path
+        self.capacity = capacity
+        self.threshold = threshold
+        self.thresholds = thresholds or {}
+        self.top_k = top_k
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._flushed_at = 0.0
+        self.vectorizer = HashedNgramVectorizer(dim)
+        self._lock = threading.Lock()
+        self._rows = [None] * capacity
+        self._agents = {}
+        self._agent_ids = np.full(capacity, -1, dtype=np.int32)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._used = np.zeros(capacity, dtype=np.float64)
+        # Row lengths under the current IDF; dropped whenever a new prompt changes it
+        self._norms = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors = self._open()
+
+    # -- persistence -------------------------------------------------------
+
+    def _files(self) -> tuple:
+        return f"{self.path}.npy", f"{self.path}.json"
+
+    def _open(self) -> np.ndarray:
+        shape = (self.capacity, self.vectorizer.dim)
+        if not self.path:
+            return np.zeros(shape, dtype=np.float32)
+        vectors_path, meta_path = self._files()
+        meta = None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.lib.format.open_memmap(vectors_path, mode="r+")
+            if meta.get("format") != _FORMAT or vectors.shape != shape or vectors.dtype != np.float32:
+                meta = None
+        except (OSError, ValueError):
+            meta = None
+        if meta is None:
+            # Missing, corrupt or shaped for other settings: start empty
+            return np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=shape)
+
+        self.vectorizer.df[:] = meta["df"]
+        self.vectorizer.documents = meta["documents"]
+        for row in meta["rows"]:
+            slot = row.pop("slot")
+            self._agent_ids[slot] = self._agent_id(row["agent"])
+            self._expires[slot] = row["expires_at"]
+            self._used[slot] = row["used_at"]
+            self._rows[slot] = row
+        return vectors
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        """Write vectors, then the sidecar atomically; caller holds the lock"""
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+        self._vectors.flush()
+        _, meta_path = self._files()
+        now = time.time()
+        rows = [
+            {**row, "slot": slot, "expires_at": float(self._expires[slot]), "used_at": float(self._used[slot])}
+            for slot, row in enumerate(self._rows)
+            if row is not None and self._expires[slot] > now
+        ]
+        meta = {
+            "format": _FORMAT,
+            "df": self.vectorizer.df.tolist(),
+            "documents": self.vectorizer.documents,
+            "rows": rows,
+        }
+        tmp_path = f"{meta_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, meta_path)
+        except OSError:
+            pass
+
+    # -- lookup / insert ---------------------------------------------------
+
+    def _agent_id(self, key: str) -> int:
+        return self._agents.setdefault(key, len(self._agents))
+
+    def _threshold(self, final_agent: str) -> float:
+        return self.thresholds.get(final_agent, self.threshold)
+
+    def _row_norms(self, idf: np.ndarray) -> np.ndarray:
+        if self._norms is None:
+            norms = np.sqrt(np.square(self._vectors) @ np.square(idf))
+            self._norms = np.where(norms > 0, norms, 1.0)
+        return self._norms
+
+    def _candidates(self, vector: np.ndarray, agent_ids: list, now: float) -> list:
+        """(cosine, slot) of the top-k live rows written by one of `agent_ids`, best first.
+
+        `vector` is IDF-weighted and unit length; rows are weighted with the same IDF here.
+        """
+        live = (self._expires > now) & np.isin(self._agent_ids, agent_ids)
+        if not live.any():
+            return []
+        idf = self.vectorizer.idf()
+        scores = (self._vectors @ (vector * idf)) / self._row_norms(idf)
+        scores[~live] = -1.0
+        k = min(self.top_k, int(live.sum()))
+        top = np.argpartition(scores, -k)[-k:]
+        return sorted(((float(scores[slot]), int(slot)) for slot in top), reverse=True)
+
+    def lookup(self, prompt: str, agent, model_name: str | None):
+        """Return {"output", "final_agent", "similarity", "matched_prompt"} for a near duplicate, or None"""
+        vector = self.vectorizer.transform(prompt)
+        entities = prompt_entities(prompt)
+        now = time.time()
+        with self._lock:
+            agent_ids = [self._agents[key] for key in reachable_keys(agent, model_name) if key in self._agents]
+            for score, slot in self._candidates(vector, agent_ids, now) if vector.any() else []:
+                row = self._rows[slot]
+                if score < self._threshold(row["final_agent"]):
+                    continue
+                numbers, names = row["entities"]
+                if numbers != entities[0] or (names and entities[1] and names != entities[1]):
+                    continue
+                self._used[slot] = now
+                self._dirty = True
+                self.hits += 1
+                return {
+                    "output": row["output"],
+                    "final_agent": row["final_agent"],
+                    "similarity": round(score, 4),
+                    "matched_prompt": row["prompt"],
+                }
+            self.misses += 1
+        return None
+
+    def add(self, prompt: str, final_agent, output: str, ttl: float, model_name: str | None) -> None:
+        frequencies = self.vectorizer.frequencies(prompt)
+        if not frequencies.any():
+            return
+        vector = self.vectorizer.weigh(frequencies)
+        now = time.time()
+        key = agent_key(final_agent, model_name)
+        with self._lock:
+            agent_id = self._agent_id(key)
+            same = self._candidates(vector, [agent_id], now)
+            if same and same[0][0] > 0.999:
+                # Re-asked prompt: refresh its row instead of storing a copy
+                slot = same[0][1]
+            else:
+                free = np.flatnonzero(self._expires <= now)
+                if free.size:
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._used))
+                    self.evictions += 1
+                self.vectorizer.learn(prompt)
+                self._norms = None
+            self._vectors[slot] = frequencies
+            if self._norms is not None:
+                self._norms[slot] = np.linalg.norm(frequencies * self.vectorizer.idf()) or 1.0
+            self._agent_ids[slot] = agent_id
+            self._expires[slot] = now + ttl
+            self._used[slot] = now
+            self._rows[slot] = {
+                "prompt": prompt,
+                "output": output,
+                "final_agent": final_agent.name,
+                "agent": key,
+                "entities": prompt_entities(prompt),
+            }
+            # Saving is O(cache size), so bursts of inserts are written out together
+            self._dirty = True
+            if time.monotonic() - self._flushed_at >= self.flush_interval:
+                self._write()
+
+    def __len__(self) -> int:
+        return int((self._expires > time.time()).sum())
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"Semantic {self.hits}/{total} hits ({rate:.0%}), {len(self)} rows, {self.evictions} evicted"
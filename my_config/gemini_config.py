@@ -1,26 +1,113 @@
-from agents import OpenAIChatCompletionsModel, RunConfig
-import os
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
+import json
+from dataclasses import asdict
+from functools import lru_cache
 
-load_dotenv()
+from my_config.settings import get_settings
 
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-gemini_base_url = os.getenv("GEMINI_BASE_URL")
-gemini_base_model = os.getenv("GEMINI_MODEL_NAME")
+# The client, model and run config are built on first use rather than at import,
+# so importing the agents (or this module) never touches the network or the API key.
 
-#
 
-client = AsyncOpenAI(
-    api_key=gemini_api_key,
-    base_url=gemini_base_url,
-)
+def build_client(base_url: str | None, api_key: str | None, max_retries: int | None = None, limiter=None):
+    """Every model client is created here, so transport-level concerns have one place to hook in"""
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
-model = OpenAIChatCompletionsModel(
-    openai_client=client,
-    model=str(gemini_base_model),
-)
+    from my_runtime.replay import transport_for
 
-run_config = RunConfig(
-    model=model,
-)
\ No newline at end of file
+    settings = get_settings()
+    kwargs = {} if max_retries is None else {"max_retries": max_retries}
+    limits = httpx.Limits(
+        max_connections=settings.model_max_connections,
+        max_keepalive_connections=settings.model_max_keepalive,
+    )
+    http_kwargs = {"limits": limits}
+    if limiter is not None:
+        http_kwargs["event_hooks"] = {"response": [limiter.observe_response]}
+    # REPLAY_MODE=record|replay puts the recorder or the cassette between the client and the network
+    transport = transport_for("model", limits)
+    if transport is not None:
+        http_kwargs["transport"] = transport
+    kwargs["http_client"] = DefaultAsyncHttpxClient(**http_kwargs)
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, **kwargs)
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    from my_runtime.rate_limit import get_rate_limiter
+
+    settings = get_settings()
+    return build_client(settings.gemini_base_url, settings.gemini_api_key, limiter=get_rate_limiter())
+
+
+@lru_cache(maxsize=1)
+def get_model():
+    from agents import OpenAIChatCompletionsModel
+
+    return OpenAIChatCompletionsModel(
+        openai_client=get_client(),
+        model=str(get_settings().gemini_model_name),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_model_pool():
+    from my_config.model_pool import build_pool
+
+    return build_pool()
+
+
+@lru_cache(maxsize=1)
+def get_model_provider():
+    from my_config.model_pool import ModelPoolProvider
+
+    return ModelPoolProvider(get_model_pool())
+
+
+@lru_cache(maxsize=1)
+def get_run_config():
+    from agents import RunConfig
+
+    # No run-wide model: each agent's `model` names a tier that the pool resolves
+    return RunConfig(
+        model_provider=get_model_provider(),
+    )
+
+
+def get_model_settings(tier: str | None):
+    """Sampling settings for agents on a tier: the small tier answers short and deterministically"""
+    from agents import ModelSettings
+
+    from my_config.model_pool import SMALL_TIER
+
+    settings = get_settings()
+    if tier == SMALL_TIER:
+        return ModelSettings(
+            temperature=settings.small_model_temperature,
+            max_tokens=settings.small_model_max_tokens,
+        )
+    return ModelSettings()
+
+
+def model_identity(agent) -> str:
+    """Tier, the models that may serve it and the sampling settings: what an agent's answers depend on besides its prompt"""
+    model = agent.model
+    if model is None or isinstance(model, str):
+        served_by = [model, get_model_pool().models_for(model)]
+    else:
+        served_by = [type(model).__name__, str(getattr(model, "model", ""))]
+    return json.dumps([served_by, asdict(agent.model_settings)], sort_keys=True, default=str)
+
+
+_LAZY = {
+    "client": get_client,
+    "model": get_model,
+    "run_config": get_run_config,
+}
+
+
+def __getattr__(name):
+    # Keeps `from my_config.gemini_config import run_config` working for the assignment scripts
+    if name in _LAZY:
+        return _LAZY[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,322 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from agents import Model, ModelProvider, OpenAIChatCompletionsModel
+
+from my_config.settings import get_settings
+from my_runtime.rate_limit import RateLimitedModel, RateLimiter, get_rate_limiter, retry_after
+
+DEFAULT_TIER = "default"
+SMALL_TIER = "small"
+LARGE_TIER = "large"
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and connection failures are worth another backend"""
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+@dataclass
+class BackendStats:
+    """Moving window of request outcomes for one backend"""
+
+    window: int = 50
+    horizon: float = 300.0
+    samples: deque = field(default_factory=deque)
+    cooldown_until: float = 0.0
+
+    def record(self, latency: float, ok: bool) -> None:
+        now = time.monotonic()
+        self.samples.append((now, latency, ok))
+        while len(self.samples) > self.window or (self.samples and now - self.samples[0][0] > self.horizon):
+            self.samples.popleft()
+
+    @property
+    def latency(self) -> float:
+        """Mean latency of successful calls; unknown backends look fast so they get tried"""
+        latencies = [latency for _, latency, ok in self.samples if ok]
+        return sum(latencies) / len(latencies) if latencies else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, _, ok in self.samples if not ok) / len(self.samples)
+
+    @property
+    def healthy(self) -> bool:
+        if time.monotonic() < self.cooldown_until:
+            return False
+        return len(self.samples) < 5 or self.error_rate < 0.5
+
+    def score(self) -> float:
+        return self.latency * (1 + 4 * self.error_rate)
+
+
+class Backend:
+    """One endpoint + model name, with its own client and health stats"""
+
+    def __init__(self, name: str, model_name: str, client_factory, tiers=(DEFAULT_TIER,), window: int = 50,
+                 limiter: RateLimiter | None = None):
+        self.name = name
+        self.model_name = model_name
+        self.tiers = set(tiers)
+        self.stats = BackendStats(window=window)
+        self.limiter = limiter
+        self._client_factory = client_factory
+        self._model = None
+
+    @property
+    def model(self) -> Model:
+        if self._model is None:
+            model = OpenAIChatCompletionsModel(model=self.model_name, openai_client=self._client_factory())
+            self._model = RateLimitedModel(model, self.limiter) if self.limiter else model
+        return self._model
+
+    def __repr__(self) -> str:
+        return f"Backend({self.name!r}, {self.model_name!r}, tiers={sorted(self.tiers)})"
+
+
+class ModelPool:
+    """The configured backends plus the hedge/failover policy shared by every tier"""
+
+    def __init__(self, backends, hedge_delay: float = 0.0, cooldown: float = 10.0):
+        self.backends = list(backends)
+        self.hedge_delay = hedge_delay
+        self.cooldown = cooldown
+        self.failovers = 0
+        self.hedges = 0
+
+    def rank(self, tier: str | None) -> list:
+        """Backends serving the tier, healthy and fastest first"""
+        tier = tier or DEFAULT_TIER
+        serving = [b for b in self.backends if tier in b.tiers] or self.backends
+        return sorted(serving, key=lambda b: (not b.stats.healthy, b.stats.score()))
+
+    def models_for(self, tier: str | None) -> list:
+        """Model names that may serve the tier, in a stable order"""
+        tier = tier or DEFAULT_TIER
+        serving = [b for b in self.backends if tier in b.tiers] or self.backends
+        return sorted(b.model_name for b in serving)
+
+    def record_failure(self, backend: Backend, error: Exception, latency: float) -> None:
+        backend.stats.record(latency, False)
+        if getattr(error, "status_code", None) == 429:
+            backend.stats.cooldown_until = time.monotonic() + retry_after(error, self.cooldown)
+
+    def limiters(self) -> list:
+        """Distinct rate limiters in use (backends on one endpoint share theirs)"""
+        seen = []
+        for backend in self.backends:
+            if backend.limiter is not None and all(backend.limiter is not other for other in seen):
+                seen.append(backend.limiter)
+        return seen
+
+    def summary(self) -> str:
+        backends = ", ".join(
+            f"{b.name} {b.stats.latency:.2f}s/{b.stats.error_rate:.0%} err" + ("" if b.stats.healthy else " (cooling down)")
+            for b in self.backends
+        )
+        return f"Model pool [{backends}], hedges {self.hedges}, failovers {self.failovers}"
+
+    def snapshot(self) -> list:
+        return [
+            {
+                "backend": b.name,
+                "model": b.model_name,
+                "tiers": sorted(b.tiers),
+                "healthy": b.stats.healthy,
+                "latency": round(b.stats.latency, 4),
+                "error_rate": round(b.stats.error_rate, 3),
+                "samples": len(b.stats.samples),
+            }
+            for b in self.backends
+        ]
+
+
+class PooledModel(Model):
+    """A Model that picks the fastest healthy backend for its tier, hedges and fails over"""
+
+    def __init__(self, pool: ModelPool, tier: str | None):
+        self.pool = pool
+        self.tier = tier
+
+    async def get_response(self, *args, **kwargs):
+        candidates = self.pool.rank(self.tier)
+        pending = {}
+        last_error = None
+
+        def launch():
+            backend = candidates.pop(0)
+            task = asyncio.ensure_future(backend.model.get_response(*args, **kwargs))
+            pending[task] = (backend, time.perf_counter())
+
+        launch()
+        try:
+            while pending:
+                timeout = self.pool.hedge_delay if self.pool.hedge_delay and candidates and len(pending) == 1 else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The leader is slow: race a second backend against it
+                    self.pool.hedges += 1
+                    launch()
+                    continue
+                for task in done:
+                    backend, started = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        backend.stats.record(time.perf_counter() - started, True)
+                        return task.result()
+                    self.pool.record_failure(backend, error, time.perf_counter() - started)
+                    last_error = error
+                    if not is_retryable(error):
+                        raise error
+                    if candidates and not pending:
+                        self.pool.failovers += 1
+                        launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream_response(self, *args, **kwargs):
+        candidates = self.pool.rank(self.tier)
+        attempts = {}  # getter task -> (backend, started, queue, pump task)
+        last_error = None
+
+        async def pump(backend, queue):
+            # The SDK opens a tracing span inside the stream, so one task must consume it from start to end
+            try:
+                async for event in backend.model.stream_response(*args, **kwargs):
+                    await queue.put(("event", event))
+                await queue.put(("done", None))
+            except Exception as e:
+                await queue.put(("error", e))
+
+        def launch():
+            backend = candidates.pop(0)
+            queue = asyncio.Queue(maxsize=64)
+            task = asyncio.ensure_future(pump(backend, queue))
+            attempts[asyncio.ensure_future(queue.get())] = (backend, time.perf_counter(), queue, task)
+
+        # Hedging and failover only apply until the first event; after that the stream is committed
+        launch()
+        winner = first = None
+        try:
+            while attempts and winner is None:
+                timeout = self.pool.hedge_delay if self.pool.hedge_delay and candidates and len(attempts) == 1 else None
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.pool.hedges += 1
+                    launch()
+                    continue
+                for getter in done:
+                    attempt = attempts.pop(getter)
+                    kind, payload = getter.result()
+                    if kind != "error":
+                        if winner is None:
+                            winner, first = attempt, (kind, payload)
+                        else:
+                            attempt[3].cancel()
+                        continue
+                    backend, started = attempt[:2]
+                    self.pool.record_failure(backend, payload, time.perf_counter() - started)
+                    last_error = payload
+                    if not is_retryable(payload):
+                        raise payload
+                    if candidates and not attempts and winner is None:
+                        self.pool.failovers += 1
+                        launch()
+        finally:
+            for getter, (_, _, _, task) in attempts.items():
+                getter.cancel()
+                task.cancel()
+
+        if winner is None:
+            raise last_error
+        backend, started, queue, task = winner
+        ok = False
+        try:
+            kind, payload = first
+            while kind == "event":
+                yield payload
+                kind, payload = await queue.get()
+            if kind == "error":
+                raise payload
+            ok = True
+        finally:
+            backend.stats.record(time.perf_counter() - started, ok)
+            task.cancel()
+
+
+class ModelPoolProvider(ModelProvider):
+    """Resolves an agent's `model` (a tier name, or None for the default tier) to a PooledModel"""
+
+    def __init__(self, pool: ModelPool):
+        self.pool = pool
+        self._models = {}
+
+    def get_model(self, model_name: str | None) -> Model:
+        tier = model_name or DEFAULT_TIER
+        if tier not in self._models:
+            self._models[tier] = PooledModel(self.pool, tier)
+        return self._models[tier]
+
+
+def load_backend_specs(raw: str | None) -> list:
+    """MODEL_POOL is either inline JSON or a path to a JSON file holding a list of backends"""
+    if not raw:
+        return []
+    if os.path.exists(raw):
+        with open(raw, encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(raw)
+
+
+def build_pool() -> ModelPool:
+    from my_config.gemini_config import build_client, get_client
+
+    settings = get_settings()
+    specs = load_backend_specs(settings.model_pool)
+    backends = []
+    for i, spec in enumerate(specs):
+        api_key = spec.get("api_key") or os.getenv(spec.get("api_key_env", "GEMINI_API_KEY"))
+        base_url = spec.get("base_url", settings.gemini_base_url)
+        # Failover is faster than the client's own retry-with-backoff, so it is off by default here
+        max_retries = spec.get("max_retries", 0)
+        limiter = RateLimiter(spec.get("rpm", 0), spec.get("tpm", 0)) if spec.get("rpm") or spec.get("tpm") else None
+        backends.append(Backend(
+            name=spec.get("name", f"backend-{i}"),
+            model_name=spec["model"],
+            client_factory=lambda base_url=base_url, api_key=api_key, max_retries=max_retries, limiter=limiter: (
+                build_client(base_url, api_key, max_retries, limiter)
+            ),
+            tiers=spec.get("tiers", [DEFAULT_TIER]),
+            window=settings.model_pool_window,
+            limiter=limiter,
+        ))
+    if not backends:
+        # No pool configured: the GEMINI_* endpoint serves every tier, optionally with a
+        # cheaper SMALL_MODEL_NAME for the small tier. Both share the endpoint's rate limits
+        tiers = [DEFAULT_TIER, LARGE_TIER]
+        limiter = get_rate_limiter()
+        if settings.small_model_name:
+            backends.append(Backend(
+                "gemini-small", settings.small_model_name, get_client, [SMALL_TIER], settings.model_pool_window, limiter
+            ))
+        else:
+            tiers.append(SMALL_TIER)
+        backends.append(Backend(
+            "gemini", str(settings.gemini_model_name), get_client, tiers, settings.model_pool_window, limiter
+        ))
+    return ModelPool(backends, hedge_delay=settings.model_pool_hedge_delay, cooldown=settings.model_pool_cooldown)
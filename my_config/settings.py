@@ -0,0 +1,233 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+def _env(name: str, default=None):
+    value = os.getenv(name)
+    return default if value is None or value == "" else value
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Every environment-driven knob in one place, read once on first use"""
+
+    # Model endpoint
+    gemini_api_key: str | None = None
+    gemini_base_url: str | None = None
+    gemini_model_name: str | None = None
+
+    # Model pool: JSON list (inline or a file path) of {name, base_url, api_key_env, model, tiers};
+    # empty means the single GEMINI_* endpoint. Hedge delay 0 disables hedging
+    model_pool: str | None = None
+    model_pool_hedge_delay: float = 0.0
+    model_pool_window: int = 50
+    model_pool_cooldown: float = 10.0
+    # Client-side budgets for the GEMINI_* endpoint (pool entries take "rpm"/"tpm"); 0 = unlimited
+    model_rpm: float = 0.0
+    model_tpm: float = 0.0
+    # Connection pool per model client (defaults match the openai SDK's own)
+    model_max_connections: int = 1000
+    model_max_keepalive: int = 100
+
+    # Tier per kind of agent: triage and the tool agents are cheap picks, code assistants need the big model
+    triage_model_tier: str = "small"
+    tool_model_tier: str = "small"
+    code_model_tier: str = "large"
+    # Without MODEL_POOL, the small tier uses this model on the GEMINI_* endpoint (unset: same model)
+    small_model_name: str | None = None
+    small_model_max_tokens: int = 512
+    small_model_temperature: float = 0.0
+
+    # Weather tool
+    weather_api_key: str | None = None
+    weather_api_url: str = "https://api.weatherapi.com/v1/current.json"
+    weather_timeout: float = 10.0
+    weather_connect_timeout: float = 3.0
+    weather_retries: int = 2
+    weather_backoff: float = 0.5
+    weather_max_concurrency: int = 10
+    weather_max_connections: int = 20
+    weather_cache_ttl: float = 600.0
+    weather_cache_size: int = 256
+
+    # Local fast-path router
+    router_min_score: float = 2.5
+    router_min_margin: float = 2.0
+    # Mixed prompts ("a python script that checks the forecast") need this much more lead per
+    # point the runner-up scores, so two-domain requests go to triage
+    router_mixed_margin: float = 1.0
+    # Follow-up turns start at the previous specialist unless the topic changes
+    sticky_routing: bool = True
+
+    # Speculative specialists: when a prompt needs triage, the router's top candidates (those scoring
+    # at least the minimum) start alongside it and the one triage picks is kept. Max tokens caps
+    # what the discarded runs may spend per prompt
+    speculative: bool = False
+    speculative_candidates: int = 1
+    speculative_min_score: float = 1.0
+    speculative_max_tokens: int = 2000
+
+    # "explain": triage says which specialist it picked and why before transferring.
+    # "fast": triage only calls the transfer tool with a small context payload and the CLI
+    # prints the transfer message locally, so the specialist starts a whole preamble sooner
+    handoff_mode: str = "explain"
+
+    # Agent instruction templates: "full" or "compact"
+    prompt_variant: str = "full"
+
+    # Whole-run response cache: "off", "memory" or "sqlite"
+    response_cache: str = "off"
+    response_cache_path: str = "response_cache.sqlite3"
+    response_cache_size: int = 1024
+    response_cache_ttl: float = 86400.0
+    response_cache_volatile_ttl: float = 300.0
+    # Near-duplicate layer over the response cache: cosine match of hashed n-gram vectors.
+    # Thresholds may be overridden per final specialist with JSON; weather answers can match looser
+    # because the place named must agree anyway. An empty path keeps the vectors in memory
+    semantic_cache: bool = False
+    semantic_cache_path: str = "semantic_cache"
+    semantic_cache_size: int = 2048
+    semantic_cache_dim: int = 1024
+    semantic_cache_threshold: float = 0.85
+    semantic_cache_thresholds: str = '{"Weather Assistant": 0.7}'
+    semantic_cache_top_k: int = 5
+
+    # Per-run metrics export; empty path disables it. Format "jsonl" or "prometheus"
+    metrics_file: str | None = None
+    metrics_format: str = "jsonl"
+
+    # Interactive conversation memory: "memory" or "sqlite"
+    session_store: str = "memory"
+    session_store_path: str = "sessions.sqlite3"
+    # In-memory store only: sessions kept at most, and idle seconds before one is dropped (0 = never)
+    session_store_size: int = 1000
+    session_store_ttl: float = 86400.0
+    session_id: str | None = None
+    session_max_tokens: int = 3000
+    session_keep_turns: int = 6
+    session_summary_tokens: int = 600
+
+    # Tool executors: process pool for @cpu_bound tools (0 = one per CPU), threads for
+    # @blocking_io tools, and the default per-call time limit in seconds
+    tool_process_workers: int = 0
+    tool_thread_workers: int = 8
+    tool_timeout: float = 10.0
+
+    # On-disk cache of tool JSON schemas keyed by source hash, written at exit. Empty means
+    # tool_schemas.json under $XDG_CACHE_HOME (or ~/.cache); "off" disables it
+    tool_schema_cache: str = ""
+
+    # Record/replay of model and weather HTTP traffic: "off", "record" or "replay". Replay speed
+    # scales the recorded timings (1 = as recorded, 0 = no waiting)
+    replay_mode: str = "off"
+    replay_file: str = "session.replay.gz"
+    replay_speed: float = 1.0
+
+    # Opt-in profiling (PROFILE=1 or --profile): collapsed stacks sampled every interval
+    # seconds, and event-loop stalls longer than stall_ms reported with the blocking stack.
+    # Only the latest max_stalls stacks are kept; totals cover every stall
+    profile: bool = False
+    profile_file: str = "profile.collapsed"
+    profile_interval: float = 0.01
+    profile_stall_ms: float = 100.0
+    profile_max_stalls: int = 100
+
+    # HTTP front-end (server.py)
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_max_streams: int = 64
+    server_queue_size: int = 64
+    server_send_timeout: float = 30.0
+    server_shutdown_grace: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            gemini_api_key=_env("GEMINI_API_KEY"),
+            gemini_base_url=_env("GEMINI_BASE_URL"),
+            gemini_model_name=_env("GEMINI_MODEL_NAME"),
+            model_pool=_env("MODEL_POOL"),
+            model_pool_hedge_delay=float(_env("MODEL_POOL_HEDGE_DELAY", cls.model_pool_hedge_delay)),
+            model_pool_window=int(_env("MODEL_POOL_WINDOW", cls.model_pool_window)),
+            model_pool_cooldown=float(_env("MODEL_POOL_COOLDOWN", cls.model_pool_cooldown)),
+            model_rpm=float(_env("MODEL_RPM", cls.model_rpm)),
+            model_tpm=float(_env("MODEL_TPM", cls.model_tpm)),
+            model_max_connections=int(_env("MODEL_MAX_CONNECTIONS", cls.model_max_connections)),
+            model_max_keepalive=int(_env("MODEL_MAX_KEEPALIVE", cls.model_max_keepalive)),
+            triage_model_tier=_env("TRIAGE_MODEL_TIER", cls.triage_model_tier),
+            tool_model_tier=_env("TOOL_MODEL_TIER", cls.tool_model_tier),
+            code_model_tier=_env("CODE_MODEL_TIER", cls.code_model_tier),
+            small_model_name=_env("SMALL_MODEL_NAME"),
+            small_model_max_tokens=int(_env("SMALL_MODEL_MAX_TOKENS", cls.small_model_max_tokens)),
+            small_model_temperature=float(_env("SMALL_MODEL_TEMPERATURE", cls.small_model_temperature)),
+            weather_api_key=_env("WEATHER_API_KEY"),
+            weather_api_url=_env("WEATHER_API_URL", cls.weather_api_url),
+            weather_timeout=float(_env("WEATHER_TIMEOUT", cls.weather_timeout)),
+            weather_connect_timeout=float(_env("WEATHER_CONNECT_TIMEOUT", cls.weather_connect_timeout)),
+            weather_retries=int(_env("WEATHER_RETRIES", cls.weather_retries)),
+            weather_backoff=float(_env("WEATHER_BACKOFF", cls.weather_backoff)),
+            weather_max_concurrency=int(_env("WEATHER_MAX_CONCURRENCY", cls.weather_max_concurrency)),
+            weather_max_connections=int(_env("WEATHER_MAX_CONNECTIONS", cls.weather_max_connections)),
+            weather_cache_ttl=float(_env("WEATHER_CACHE_TTL", cls.weather_cache_ttl)),
+            weather_cache_size=int(_env("WEATHER_CACHE_SIZE", cls.weather_cache_size)),
+            router_min_score=float(_env("ROUTER_MIN_SCORE", cls.router_min_score)),
+            router_min_margin=float(_env("ROUTER_MIN_MARGIN", cls.router_min_margin)),
+            router_mixed_margin=float(_env("ROUTER_MIXED_MARGIN", cls.router_mixed_margin)),
+            sticky_routing=_env("STICKY_ROUTING", "1").lower() not in ("0", "false", "no", "off"),
+            speculative=_env("SPECULATIVE", "0").lower() in ("1", "true", "yes", "on"),
+            speculative_candidates=int(_env("SPECULATIVE_CANDIDATES", cls.speculative_candidates)),
+            speculative_min_score=float(_env("SPECULATIVE_MIN_SCORE", cls.speculative_min_score)),
+            speculative_max_tokens=int(_env("SPECULATIVE_MAX_TOKENS", cls.speculative_max_tokens)),
+            handoff_mode=_env("HANDOFF_MODE", cls.handoff_mode).lower(),
+            prompt_variant=_env("PROMPT_VARIANT", cls.prompt_variant).lower(),
+            response_cache=_env("RESPONSE_CACHE", cls.response_cache).lower(),
+            response_cache_path=_env("RESPONSE_CACHE_PATH", cls.response_cache_path),
+            response_cache_size=int(_env("RESPONSE_CACHE_SIZE", cls.response_cache_size)),
+            response_cache_ttl=float(_env("RESPONSE_CACHE_TTL", cls.response_cache_ttl)),
+            response_cache_volatile_ttl=float(_env("RESPONSE_CACHE_VOLATILE_TTL", cls.response_cache_volatile_ttl)),
+            semantic_cache=_env("SEMANTIC_CACHE", "0").lower() in ("1", "true", "yes", "on"),
+            semantic_cache_path=os.getenv("SEMANTIC_CACHE_PATH", cls.semantic_cache_path),
+            semantic_cache_size=int(_env("SEMANTIC_CACHE_SIZE", cls.semantic_cache_size)),
+            semantic_cache_dim=int(_env("SEMANTIC_CACHE_DIM", cls.semantic_cache_dim)),
+            semantic_cache_threshold=float(_env("SEMANTIC_CACHE_THRESHOLD", cls.semantic_cache_threshold)),
+            semantic_cache_thresholds=_env("SEMANTIC_CACHE_THRESHOLDS", cls.semantic_cache_thresholds),
+            semantic_cache_top_k=int(_env("SEMANTIC_CACHE_TOP_K", cls.semantic_cache_top_k)),
+            metrics_file=_env("METRICS_FILE"),
+            metrics_format=_env("METRICS_FORMAT", cls.metrics_format).lower(),
+            session_store=_env("SESSION_STORE", cls.session_store).lower(),
+            session_store_path=_env("SESSION_STORE_PATH", cls.session_store_path),
+            session_store_size=int(_env("SESSION_STORE_SIZE", cls.session_store_size)),
+            session_store_ttl=float(_env("SESSION_STORE_TTL", cls.session_store_ttl)),
+            session_id=_env("SESSION_ID"),
+            session_max_tokens=int(_env("SESSION_MAX_TOKENS", cls.session_max_tokens)),
+            session_keep_turns=int(_env("SESSION_KEEP_TURNS", cls.session_keep_turns)),
+            session_summary_tokens=int(_env("SESSION_SUMMARY_TOKENS", cls.session_summary_tokens)),
+            tool_process_workers=int(_env("TOOL_PROCESS_WORKERS", cls.tool_process_workers)),
+            tool_thread_workers=int(_env("TOOL_THREAD_WORKERS", cls.tool_thread_workers)),
+            tool_timeout=float(_env("TOOL_TIMEOUT", cls.tool_timeout)),
+            tool_schema_cache=_env("TOOL_SCHEMA_CACHE", cls.tool_schema_cache),
+            replay_mode=_env("REPLAY_MODE", cls.replay_mode).lower(),
+            replay_file=_env("REPLAY_FILE", cls.replay_file),
+            replay_speed=float(_env("REPLAY_SPEED", cls.replay_speed)),
+            profile=_env("PROFILE", "0").lower() in ("1", "true", "yes", "on"),
+            profile_file=_env("PROFILE_FILE", cls.profile_file),
+            profile_interval=float(_env("PROFILE_INTERVAL", cls.profile_interval)),
+            profile_stall_ms=float(_env("PROFILE_STALL_MS", cls.profile_stall_ms)),
+            profile_max_stalls=int(_env("PROFILE_MAX_STALLS", cls.profile_max_stalls)),
+            server_host=_env("SERVER_HOST", cls.server_host),
+            server_port=int(_env("SERVER_PORT", cls.server_port)),
+            server_max_streams=int(_env("SERVER_MAX_STREAMS", cls.server_max_streams)),
+            server_queue_size=int(_env("SERVER_QUEUE_SIZE", cls.server_queue_size)),
+            server_send_timeout=float(_env("SERVER_SEND_TIMEOUT", cls.server_send_timeout)),
+            server_shutdown_grace=float(_env("SERVER_SHUTDOWN_GRACE", cls.server_shutdown_grace)),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load .env (once) and return the shared settings object"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings.from_env()
@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import functools
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from my_config.settings import get_settings
+
+# Raw functions behind @cpu_bound, keyed "module:qualname". The module-level name ends up
+# bound to the async wrapper (or a FunctionTool), which can't be pickled, so worker
+# processes look the original up here after importing its module.
+_REGISTRY = {}
+
+
+class ToolTimeoutError(TimeoutError):
+    """A tool ran past its time budget; the work was cancelled or its worker replaced"""
+
+
+def _invoke(key: str, args: tuple, kwargs: dict):
+    """Entry point inside a worker process"""
+    if key not in _REGISTRY:
+        importlib.import_module(key.split(":", 1)[0])
+    return _REGISTRY[key](*args, **kwargs)
+
+
+class _ProcessPool:
+    """A ProcessPoolExecutor that can be swapped out when a call has to be abandoned"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.generation = 0
+
+    def get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=get_settings().tool_process_workers or None)
+            return self._executor, self.generation
+
+    def recycle(self, generation: int) -> None:
+        """Replace the pool a stuck call is running in; its other calls are resubmitted by their callers"""
+        with self._lock:
+            if generation != self.generation or self._executor is None:
+                return
+            executor, self._executor = self._executor, None
+            self.generation += 1
+        # There is no public way to stop one running task, so the old workers go with it
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_process_pool = _ProcessPool()
+_thread_pool = None
+_thread_pool_lock = threading.Lock()
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=get_settings().tool_thread_workers, thread_name_prefix="tool-io"
+            )
+        return _thread_pool
+
+
+async def run_in_process(key: str, args: tuple, kwargs: dict, timeout: float | None):
+    for attempt in range(2):
+        executor, generation = _process_pool.get()
+        future = executor.submit(_invoke, key, args, kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except BrokenProcessPool:
+            # Another call's timeout recycled the pool under us: run once more on the new one
+            if attempt == 0 and generation != _process_pool.generation:
+                continue
+            raise
+        except asyncio.CancelledError:
+            # Queued calls dropped by a recycle are resubmitted too; a real cancellation isn't
+            if attempt == 0 and generation != _process_pool.generation and not asyncio.current_task().cancelling():
+                continue
+            _abandon(future, generation)
+            raise
+        except asyncio.TimeoutError:
+            _abandon(future, generation)
+            raise ToolTimeoutError(f"{key} took longer than {timeout}s") from None
+
+
+def _abandon(future, generation: int) -> None:
+    # Queued work is simply dropped; work already running needs its worker replaced
+    if not future.cancel():
+        _process_pool.recycle(generation)
+
+
+async def run_in_thread(func, args: tuple, kwargs: dict, timeout: float | None):
+    # Threads can't be stopped, so a timed-out call finishes in the background and is discarded
+    context = contextvars.copy_context()
+    future = asyncio.get_running_loop().run_in_executor(
+        _get_thread_pool(), functools.partial(context.run, func, *args, **kwargs)
+    )
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise ToolTimeoutError(f"{func.__qualname__} took longer than {timeout}s") from None
+
+
+def _resolve_timeout(timeout):
+    return get_settings().tool_timeout if timeout is None else timeout
+
+
+def cpu_bound(func=None, *, timeout: float | None = None):
+    """Run a sync tool body in the process pool so it never blocks the event loop.
+
+    Arguments and the result must be picklable. Goes under @function_tool (and @timed_tool);
+    the tool's signature and docstring are preserved.
+    """
+    if func is None:
+        return functools.partial(cpu_bound, timeout=timeout)
+
+    key = f"{func.__module__}:{func.__qualname__}"
+    _REGISTRY[key] = func
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_process(key, args, kwargs, _resolve_timeout(timeout))
+
+    return wrapper
+
+
+def blocking_io(func=None, *, timeout: float | None = None):
+    """Run a sync tool body that blocks on I/O in the thread pool"""
+    if func is None:
+        return functools.partial(blocking_io, timeout=timeout)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_thread(func, args, kwargs, _resolve_timeout(timeout))
+
+    return wrapper
+
+
+def shutdown_executors() -> None:
+    global _thread_pool
+    _process_pool.shutdown()
+    with _thread_pool_lock:
+        pool, _thread_pool = _thread_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
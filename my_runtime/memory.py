@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from my_config.settings import get_settings
+
+SNIPPET_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting without a tokenizer"""
+    return len(text) // 4 + 1
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= SNIPPET_CHARS else text[: SNIPPET_CHARS - 1] + "…"
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+    agent: str | None = None
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.user) + estimate_tokens(self.assistant)
+
+
+@dataclass
+class Session:
+    session_id: str
+    turns: list = field(default_factory=list)
+    summary: list = field(default_factory=list)
+    last_agent: str | None = None
+
+    def add_turn(self, user: str, assistant: str, agent: str | None) -> None:
+        self.turns.append(Turn(user, assistant, agent))
+        if agent:
+            self.last_agent = agent
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self.summary.clear()
+        self.last_agent = None
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.turns or self.summary)
+
+
+class ContextWindow:
+    """Keeps recent turns verbatim, folds older ones into a rolling summary, and caps the total"""
+
+    def __init__(self, max_tokens: int = 3000, keep_turns: int = 6, summary_tokens: int = 600):
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+
+    def compact(self, session: Session) -> None:
+        """Move turns that no longer fit into the summary (no model call, extractive only)"""
+        while session.turns and (
+            len(session.turns) > self.keep_turns or self._history_tokens(session) > self.max_tokens
+        ):
+            turn = session.turns.pop(0)
+            agent = turn.agent or "Assistant"
+            session.summary.append(f"- User: {_snippet(turn.user)} | {agent}: {_snippet(turn.assistant)}")
+
+        # The summary itself is bounded too; the oldest lines go first
+        while session.summary and sum(estimate_tokens(line) for line in session.summary) > self.summary_tokens:
+            session.summary.pop(0)
+
+    def _history_tokens(self, session: Session) -> int:
+        return sum(turn.tokens for turn in session.turns) + sum(estimate_tokens(line) for line in session.summary)
+
+    def build_input(self, session: Session, prompt: str) -> list:
+        """Runner input: summary, then recent turns, then the new prompt"""
+        self.compact(session)
+        items = []
+        if session.summary:
+            items.append({
+                "role": "system",
+                "content": "Summary of the earlier conversation:\n" + "\n".join(session.summary),
+            })
+        for turn in session.turns:
+            items.append({"role": "user", "content": turn.user})
+            items.append({"role": "assistant", "content": turn.assistant})
+        items.append({"role": "user", "content": prompt})
+        return items
+
+
+class MemorySessionStore:
+    """Sessions in process memory, least recently used dropped past `max_sessions` or after `ttl` idle seconds"""
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 86400.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            session_id, (_, touched) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and (not self.ttl or now - touched < self.ttl):
+                break
+            del self._sessions[session_id]
+
+    def load(self, session_id: str) -> Session:
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._sessions.pop(session_id, None)
+        session = entry[0] if entry else Session(session_id)
+        self._sessions[session_id] = (session, now)
+        return session
+
+    def save(self, session: Session) -> None:
+        self._sessions.pop(session.session_id, None)
+        self._sessions[session.session_id] = (session, time.monotonic())
+        self._evict(time.monotonic())
+
+
+class SQLiteSessionStore:
+    """Persists sessions so a conversation can be resumed after a restart"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, summary TEXT NOT NULL, last_agent TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, user TEXT NOT NULL, assistant TEXT NOT NULL, "
+            "agent TEXT, created_at REAL NOT NULL, PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str) -> Session:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, last_agent FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            turns = self._conn.execute(
+                "SELECT user, assistant, agent, created_at FROM turns WHERE session_id = ? ORDER BY seq",
+                (session_id,),
+            ).fetchall()
+        session = Session(session_id, turns=[Turn(*turn) for turn in turns])
+        if row is not None:
+            session.summary = json.loads(row[0])
+            session.last_agent = row[1]
+        return session
+
+    def save(self, session: Session) -> None:
+        # Only the compacted window is stored; older turns live on in the summary
+        with self._lock:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session.session_id,))
+            self._conn.executemany(
+                "INSERT INTO turns (session_id, seq, user, assistant, agent, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (session.session_id, seq, turn.user, turn.assistant, turn.agent, turn.created_at)
+                    for seq, turn in enumerate(session.turns)
+                ],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, summary, last_agent, updated_at) VALUES (?, ?, ?, ?)",
+                (session.session_id, json.dumps(session.summary), session.last_agent, time.time()),
+            )
+            self._conn.commit()
+
+
+_session_store = None
+
+
+def get_session_store():
+    global _session_store
+    if _session_store is None:
+        settings = get_settings()
+        if settings.session_store == "sqlite":
+            _session_store = SQLiteSessionStore(settings.session_store_path)
+        else:
+            _session_store = MemorySessionStore(settings.session_store_size, settings.session_store_ttl)
+    return _session_store
+
+
+def get_context_window() -> ContextWindow:
+    settings = get_settings()
+    return ContextWindow(
+        max_tokens=settings.session_max_tokens,
+        keep_turns=settings.session_keep_turns,
+        summary_tokens=settings.session_summary_tokens,
+    )
+
+
+def new_session_id() -> str:
+    return get_settings().session_id or uuid.uuid4().hex[:12]
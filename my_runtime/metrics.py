@@ -0,0 +1,288 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from my_config.settings import get_settings
+from my_runtime.profiling import active_profiler
+from my_runtime.replay import recording
+
+# The run being measured in the current task; None whenever metrics are off
+_current_run = contextvars.ContextVar("current_run", default=None)
+
+
+class RunTracker:
+    """Collects per-phase timings, tool calls, tokens and the agent chain for one run"""
+
+    def __init__(self, prompt: str, starting_agent: str):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.prompt = prompt
+        self.prompt_chars = len(prompt)
+        self.started = time.perf_counter()
+        self.agent_chain = [starting_agent]
+        self.phases = []
+        self.tools = []
+        self.first_token = None
+        self.events = 0
+        self.usage = {}
+        self.rate_limit_wait = 0.0
+        self.max_queue_depth = 0
+        self._segment_start = self.started
+        self._handoff_start = None
+        self._token = None
+        self._finished = False
+
+    # Stream events ------------------------------------------------------
+
+    def observe(self, event) -> None:
+        """Feed every event from stream_events() through here"""
+        now = time.perf_counter()
+        self.events += 1
+        if event.type == "raw_response_event":
+            if self.first_token is None and getattr(event.data, "type", "") == "response.output_text.delta":
+                self.first_token = now - self.started
+        elif event.type == "run_item_stream_event" and event.item.type == "handoff_call_item":
+            self._handoff_start = now
+        elif event.type in ("agent_updated_stream_event", "agent_handoff_event"):
+            agent = getattr(event, "new_agent", None) or getattr(event.data, "to_agent", None)
+            if agent is None or agent.name == self.agent_chain[-1]:
+                return
+            self._close_segment(self._handoff_start or now)
+            if self._handoff_start is not None:
+                self.phases.append(self._phase("handoff", self.agent_chain[-1], self._handoff_start, now))
+                self._handoff_start = None
+            self.agent_chain.append(agent.name)
+            self._segment_start = now
+
+    def _phase(self, name, agent, start, end) -> dict:
+        return {
+            "phase": name,
+            "agent": agent,
+            "start": round(start - self.started, 4),
+            "duration": round(end - start, 4),
+        }
+
+    def _close_segment(self, end) -> None:
+        agent = self.agent_chain[-1]
+        # The first agent of a multi-agent chain is doing triage; everyone else generates
+        name = "triage" if len(self.agent_chain) == 1 and agent == "Triage Agent" else "generation"
+        self.phases.append(self._phase(name, agent, self._segment_start, end))
+
+    # Tools --------------------------------------------------------------
+
+    def record_tool(self, name: str, start: float, end: float, ok: bool) -> None:
+        self.tools.append({
+            "tool": name,
+            "agent": self.agent_chain[-1],
+            "start": round(start - self.started, 4),
+            "duration": round(end - start, 4),
+            "ok": ok,
+        })
+
+    # Rate limiting ------------------------------------------------------
+
+    def record_rate_limit_wait(self, seconds: float, queue_depth: int) -> None:
+        self.rate_limit_wait += seconds
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+    # Completion ---------------------------------------------------------
+
+    def finish(self, result=None, error: Exception | None = None):
+        if self._finished:
+            return None
+        self._finished = True
+        end = time.perf_counter()
+        self._close_segment(end)
+        if self._token is not None:
+            _current_run.reset(self._token)
+            self._token = None
+
+        if result is not None:
+            usage = result.context_wrapper.usage
+            self.usage = {
+                "requests": usage.requests,
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "total_tokens": usage.total_tokens,
+            }
+            final_agent = getattr(result, "last_agent", None)
+            if final_agent is not None and final_agent.name != self.agent_chain[-1]:
+                self.agent_chain.append(final_agent.name)
+
+        record = {
+            "run_id": self.run_id,
+            "timestamp": time.time(),
+            "prompt_chars": self.prompt_chars,
+            "duration": round(end - self.started, 4),
+            "time_to_first_token": round(self.first_token, 4) if self.first_token is not None else None,
+            "events": self.events,
+            "agent_chain": self.agent_chain,
+            "phases": self.phases,
+            "tools": self.tools,
+            "usage": self.usage,
+            "rate_limit_wait": round(self.rate_limit_wait, 4),
+            "max_queue_depth": self.max_queue_depth,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+        }
+        if get_settings().metrics_file:
+            _exporter().export(record)
+        cassette = recording()
+        if cassette is not None:
+            cassette.add_run(self.prompt, record)
+        profiler = active_profiler()
+        if profiler is not None:
+            profiler.add_run(record)
+        return record
+
+
+def start_run(prompt: str, starting_agent: str):
+    """Begin tracking a run; returns None (and costs nothing further) when metrics are off.
+
+    Call this before Runner.run/run_streamed so the tool wrappers, which run in tasks
+    copied from the caller's context, can see the tracker. While REPLAY_MODE=record, runs are
+    tracked so the cassette gets each prompt and its timings; while profiling, so agent and
+    tool wall time reach the profiler.
+    """
+    if not get_settings().metrics_file and recording() is None and active_profiler() is None:
+        return None
+    tracker = RunTracker(prompt, starting_agent)
+    tracker._token = _current_run.set(tracker)
+    return tracker
+
+
+def timed_tool(func):
+    """Time a tool body into the current run; a single ContextVar lookup when metrics are off.
+
+    Goes under @function_tool so the tool's signature and docstring are preserved.
+    """
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            tracker = _current_run.get()
+            if tracker is None:
+                return await func(*args, **kwargs)
+            start, ok = time.perf_counter(), False
+            try:
+                result = await func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                tracker.record_tool(name, start, time.perf_counter(), ok)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tracker = _current_run.get()
+        if tracker is None:
+            return func(*args, **kwargs)
+        start, ok = time.perf_counter(), False
+        try:
+            result = func(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            tracker.record_tool(name, start, time.perf_counter(), ok)
+
+    return wrapper
+
+
+class JsonLinesExporter:
+    """Appends one JSON object per run"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class PrometheusExporter:
+    """Keeps running totals and rewrites a Prometheus text-format file after every run"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.ttft_sum = 0.0
+        self.ttft_count = 0
+        self.handoffs = 0
+        self.tokens = defaultdict(int)
+        self.phase_seconds = defaultdict(float)
+        self.tool_calls = defaultdict(int)
+        self.tool_seconds = defaultdict(float)
+        self.rate_limit_wait = 0.0
+        self.max_queue_depth = 0
+
+    def export(self, record: dict) -> None:
+        with self._lock:
+            self.runs += 1
+            self.errors += record["error"] is not None
+            self.duration_sum += record["duration"]
+            if record["time_to_first_token"] is not None:
+                self.ttft_sum += record["time_to_first_token"]
+                self.ttft_count += 1
+            self.handoffs += len(record["agent_chain"]) - 1
+            for kind, value in record["usage"].items():
+                self.tokens[kind] += value
+            for phase in record["phases"]:
+                self.phase_seconds[phase["phase"]] += phase["duration"]
+            for tool in record["tools"]:
+                self.tool_calls[tool["tool"]] += 1
+                self.tool_seconds[tool["tool"]] += tool["duration"]
+            self.rate_limit_wait += record["rate_limit_wait"]
+            self.max_queue_depth = max(self.max_queue_depth, record["max_queue_depth"])
+            self._write()
+
+    def _write(self) -> None:
+        lines = [
+            "# TYPE agent_runs_total counter",
+            f"agent_runs_total {self.runs}",
+            "# TYPE agent_run_errors_total counter",
+            f"agent_run_errors_total {self.errors}",
+            "# TYPE agent_run_duration_seconds summary",
+            f"agent_run_duration_seconds_sum {self.duration_sum:.6f}",
+            f"agent_run_duration_seconds_count {self.runs}",
+            "# TYPE agent_time_to_first_token_seconds summary",
+            f"agent_time_to_first_token_seconds_sum {self.ttft_sum:.6f}",
+            f"agent_time_to_first_token_seconds_count {self.ttft_count}",
+            "# TYPE agent_handoffs_total counter",
+            f"agent_handoffs_total {self.handoffs}",
+            "# TYPE agent_rate_limit_wait_seconds_total counter",
+            f"agent_rate_limit_wait_seconds_total {self.rate_limit_wait:.6f}",
+            "# TYPE agent_rate_limit_queue_depth_max gauge",
+            f"agent_rate_limit_queue_depth_max {self.max_queue_depth}",
+            "# TYPE agent_tokens_total counter",
+        ]
+        lines += [f'agent_tokens_total{{kind="{kind}"}} {value}' for kind, value in sorted(self.tokens.items())]
+        lines.append("# TYPE agent_phase_seconds_total counter")
+        lines += [f'agent_phase_seconds_total{{phase="{name}"}} {value:.6f}' for name, value in sorted(self.phase_seconds.items())]
+        lines.append("# TYPE agent_tool_calls_total counter")
+        lines += [f'agent_tool_calls_total{{tool="{name}"}} {value}' for name, value in sorted(self.tool_calls.items())]
+        lines.append("# TYPE agent_tool_seconds_total counter")
+        lines += [f'agent_tool_seconds_total{{tool="{name}"}} {value:.6f}' for name, value in sorted(self.tool_seconds.items())]
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+@functools.lru_cache(maxsize=1)
+def _exporter():
+    settings = get_settings()
+    if settings.metrics_format == "prometheus":
+        return PrometheusExporter(settings.metrics_file)
+    return JsonLinesExporter(settings.metrics_file)
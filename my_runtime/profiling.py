@@ -0,0 +1,297 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict, deque
+
+from my_config.settings import get_settings
+
+# Leaf frames of a thread that is parked rather than working; their samples aren't CPU time
+_IDLE = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("connection.py", "_poll"),
+    ("connection.py", "wait"),
+}
+
+# Python frames kept per sample; deeper stacks are cut at the root end
+_MAX_DEPTH = 96
+
+# Repeat stalls at an already reported spot get at most one stderr line per this many seconds
+_REPEAT_REPORT_INTERVAL = 10.0
+
+
+class Profiler:
+    """Event-loop stall watchdog, sampling profiler and per-agent / per-tool wall time for one process.
+
+    A single daemon thread wakes every `interval` seconds. It samples the Python stack of every
+    busy thread into collapsed-stack counts (flamegraph.pl / speedscope format), and checks a
+    heartbeat the event loop posts: when the loop hasn't run it for `stall_threshold` seconds,
+    the loop thread's stack at that moment is kept as the blocking culprit.
+    """
+
+    def __init__(self, path: str, interval: float = 0.01, stall_threshold: float = 0.1, max_stalls: int = 100):
+        self.path = path
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.samples = Counter()
+        self.sample_count = 0
+        self.idle_samples = 0
+        # Only the latest stacks are kept; the totals and per-spot counts cover every stall
+        self.stalls = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self.stall_seconds = 0.0
+        self.longest_stall = 0.0
+        self.stall_sites = Counter()
+        self._next_repeat_report = 0.0
+        self._unreported = 0
+        self.agent_seconds = defaultdict(float)
+        self.tool_seconds = defaultdict(float)
+        self.tool_calls = Counter()
+        self.handoff_seconds = 0.0
+        self.io_seconds = 0.0
+        self.runs = 0
+        self._labels = {}
+        self._thread_names = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._loop_thread = None
+        self._beat_handle = None
+        self._last_beat = 0.0
+        self._stall = None
+        self._waiting = False
+        self.started = None
+
+    # Lifecycle ----------------------------------------------------------
+
+    def start(self) -> None:
+        """Start watching the running event loop (call from inside it)"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self._beat()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._beat_handle is not None:
+            self._beat_handle.cancel()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+    def _beat(self) -> None:
+        self._last_beat = time.perf_counter()
+        # Half the threshold keeps detection prompt without scheduling a callback per sample
+        self._beat_handle = self._loop.call_later(self.stall_threshold / 2, self._beat)
+
+    # Sampler thread -----------------------------------------------------
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        refreshed = 0.0
+        previous = time.perf_counter()
+        owed = 0.0
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            # A busy GIL delays our wake-ups; weight the sample by the intervals it stands for
+            owed += (now - previous) / self.interval
+            previous = now
+            weight = int(owed)
+            owed -= weight
+            if not weight:
+                continue
+            if now - refreshed > 1.0:
+                self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+                refreshed = now
+            frames = sys._current_frames()
+            if self._waiting:
+                # Blocked on the user on purpose: neither a stall nor CPU
+                frames.pop(self._loop_thread, None)
+                self.idle_samples += weight
+            else:
+                self._check_stall(now, frames.get(self._loop_thread))
+            for ident, frame in frames.items():
+                if ident != me:
+                    self._sample(ident, frame, weight)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)})"
+        return label
+
+    def _sample(self, ident: int, frame, weight: int) -> None:
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in _IDLE:
+            self.idle_samples += weight
+            return
+        stack = []
+        while frame is not None and len(stack) < _MAX_DEPTH:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.append(self._thread_names.get(ident, f"thread-{ident}"))
+        stack.reverse()
+        self.samples[";".join(stack)] += weight
+        self.sample_count += weight
+
+    def _check_stall(self, now: float, frame) -> None:
+        beat = self._last_beat
+        blocked = now - beat - self.stall_threshold / 2
+        if self._stall is None:
+            if blocked >= self.stall_threshold and frame is not None:
+                # Captured while the loop is still stuck, so this is the code blocking it
+                self._stall = {
+                    "started": beat,
+                    "site": f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})",
+                    "stack": "".join(traceback.format_stack(frame)),
+                }
+        elif beat > self._stall["started"]:
+            stall = self._stall
+            self._stall = None
+            stall["duration"] = beat - stall["started"] - self.stall_threshold / 2
+            stall["at"] = stall.pop("started") - self.started
+            with self._lock:
+                self.stalls.append(stall)
+                self.stall_count += 1
+                self.stall_seconds += stall["duration"]
+                self.longest_stall = max(self.longest_stall, stall["duration"])
+                self.stall_sites[stall["site"]] += 1
+                seen = self.stall_sites[stall["site"]]
+            self._report(stall, seen, now)
+
+    def _report(self, stall: dict, seen: int, now: float) -> None:
+        """Full stack the first time a spot blocks the loop; afterwards a rate-limited one-line tally"""
+        if seen == 1:
+            print(f"\n🐢 Event loop blocked for {stall['duration'] * 1000:.0f} ms in:\n{stall['stack']}",
+                  file=sys.stderr, flush=True)
+            return
+        self._unreported += 1
+        if now < self._next_repeat_report:
+            return
+        self._next_repeat_report = now + _REPEAT_REPORT_INTERVAL
+        print(f"🐢 {self._unreported} more stall(s), latest {stall['duration'] * 1000:.0f} ms at {stall['site']} "
+              f"({seen} there so far)", file=sys.stderr, flush=True)
+        self._unreported = 0
+
+    # Wall-time attribution ----------------------------------------------
+
+    def add_run(self, record: dict) -> None:
+        """Fold one finished RunTracker record into the per-agent and per-tool totals"""
+        with self._lock:
+            self.runs += 1
+            for phase in record["phases"]:
+                if phase["phase"] == "handoff":
+                    self.handoff_seconds += phase["duration"]
+                else:
+                    self.agent_seconds[phase["agent"]] += phase["duration"]
+            for call in record["tools"]:
+                self.tool_seconds[call["tool"]] += call["duration"]
+                self.tool_calls[call["tool"]] += 1
+
+    def wait_for_user(self, waiting: bool) -> None:
+        if not waiting:
+            self._last_beat = time.perf_counter()
+        self._stall = None
+        self._waiting = waiting
+
+    def add_io(self, seconds: float) -> None:
+        # Called from the loop thread only, so no lock
+        self.io_seconds += seconds
+
+    # Reporting ----------------------------------------------------------
+
+    def write(self) -> None:
+        """Write the collapsed stacks to `path` and the stall stacks next to it"""
+        if not self.path:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        if self.stalls:
+            with open(f"{self.path}.stalls", "w", encoding="utf-8") as f:
+                for site, count in self.stall_sites.most_common():
+                    f.write(f"# {count:>5} stall(s) at {site}\n")
+                f.write(f"# Last {len(self.stalls)} of {self.stall_count} stacks:\n\n")
+                for stall in self.stalls:
+                    f.write(f"# +{stall['at']:.3f}s blocked {stall['duration'] * 1000:.0f} ms\n{stall['stack']}\n")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "samples": self.sample_count,
+                "stalls": self.stall_count,
+                "stall_seconds": round(self.stall_seconds, 4),
+                "longest_stall": round(self.longest_stall, 4),
+                "stall_sites": dict(self.stall_sites.most_common(5)),
+                "runs": self.runs,
+                "agent_seconds": {name: round(value, 4) for name, value in self.agent_seconds.items()},
+                "tool_seconds": {name: round(value, 4) for name, value in self.tool_seconds.items()},
+                "handoff_seconds": round(self.handoff_seconds, 4),
+                "terminal_io_seconds": round(self.io_seconds, 4),
+            }
+
+    def summary_lines(self) -> list:
+        snapshot = self.snapshot()
+        lines = [
+            f"🔬 Profile: {snapshot['samples']} samples every {self.interval * 1000:.0f} ms -> {self.path}",
+            f"🐢 {snapshot['stalls']} event-loop stall(s) over {self.stall_threshold * 1000:.0f} ms"
+            + (f", longest {snapshot['longest_stall'] * 1000:.0f} ms (stacks in {self.path}.stalls)" if self.stalls else ""),
+        ]
+        # Agent time includes its tool calls and the consumer's handling of its events
+        for name, seconds in sorted(self.agent_seconds.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"   agent {name:<22}{seconds:>9.3f}s")
+        for name, seconds in sorted(self.tool_seconds.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"   tool  {name:<22}{seconds:>9.3f}s  ({self.tool_calls[name]} calls)")
+        if self.handoff_seconds:
+            lines.append(f"   {'handoffs':<28}{self.handoff_seconds:>9.3f}s")
+        lines.append(f"   {'terminal I/O':<28}{self.io_seconds:>9.3f}s")
+        return lines
+
+
+_active = None
+
+
+def active_profiler() -> Profiler | None:
+    """The running profiler, or None when profiling is off"""
+    return _active
+
+
+def read_input(prompt: str) -> str:
+    """input() from inside the event loop, without the wait counting as a stall while profiling"""
+    profiler = _active
+    if profiler is None:
+        return input(prompt)
+    profiler.wait_for_user(True)
+    try:
+        return input(prompt)
+    finally:
+        profiler.wait_for_user(False)
+
+
+async def profiled(coro, enabled: bool | None = None):
+    """Await `coro`, profiling the event loop around it when `enabled` (default: PROFILE)"""
+    global _active
+    settings = get_settings()
+    if not (settings.profile if enabled is None else enabled):
+        return await coro
+    profiler = Profiler(
+        settings.profile_file, settings.profile_interval, settings.profile_stall_ms / 1000, settings.profile_max_stalls
+    )
+    profiler.start()
+    _active = profiler
+    try:
+        return await coro
+    finally:
+        _active = None
+        profiler.stop()
+        for line in profiler.summary_lines():
+            print(line)
@@ -0,0 +1,248 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import time
+from functools import lru_cache
+
+from agents import Model
+
+from my_config.settings import get_settings
+from my_runtime.memory import estimate_tokens
+from my_runtime.metrics import _current_run
+
+# Lower number = served first. Interactive turns jump ahead of queued batch prompts
+INTERACTIVE = 0
+BATCH = 10
+
+# Priority of model requests made from the current task (batch_runner sets BATCH)
+request_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+# Output budget assumed when an agent sets no max_tokens; corrected from real usage afterwards
+DEFAULT_OUTPUT_TOKENS = 256
+
+
+def retry_after(error_or_response, default: float) -> float:
+    """Seconds the server asked us to back off for (Retry-After), or `default`"""
+    response = getattr(error_or_response, "response", error_or_response)
+    if not hasattr(response, "headers"):
+        response = None
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else default
+    except ValueError:
+        return default
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, bursting up to a full minute's budget"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        self._refill()
+        # A request bigger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        """Correct an earlier estimate; a negative amount charges extra"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "event")
+
+    def __init__(self, priority, seq, tokens):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.event = asyncio.Event()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min budgets shared by every caller, served in priority then FIFO order"""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+        # Metrics
+        self.acquired = 0
+        self.throttled = 0
+        self.max_queue_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _time_until_ready(self, tokens: int) -> float:
+        wait = self.paused_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.time_until(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.time_until(tokens))
+        return max(0.0, wait)
+
+    def _wake_head(self) -> None:
+        if self._queue:
+            self._queue[0].event.set()
+
+    async def acquire(self, tokens: int = 0, priority: int | None = None) -> float:
+        """Wait for budget for one request of about `tokens` tokens; returns the seconds waited"""
+        waiter = _Waiter(request_priority.get() if priority is None else priority, next(self._seq), tokens)
+        heapq.heappush(self._queue, waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        started = time.monotonic()
+        try:
+            while True:
+                if self._queue[0] is waiter:
+                    wait = self._time_until_ready(tokens)
+                    if wait <= 0:
+                        break
+                else:
+                    wait = None
+                waiter.event.clear()
+                try:
+                    # Woken early when this waiter reaches the head of the queue
+                    await asyncio.wait_for(waiter.event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            self._wake_head()
+            raise
+
+        heapq.heappop(self._queue)
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        self._wake_head()
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        tracker = _current_run.get()
+        if tracker is not None:
+            tracker.record_rate_limit_wait(waited, len(self._queue) + 1)
+        return waited
+
+    def settle(self, estimated: int, actual: int | None) -> None:
+        """Replace the token estimate charged by acquire() with the real usage"""
+        if self.tokens is not None and actual is not None:
+            self.tokens.give_back(estimated - actual)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every queued request back, e.g. for a 429's Retry-After"""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def observe_response(self, response) -> None:
+        """httpx response hook: sees every 429, including ones the OpenAI client retries itself"""
+        if response.status_code == 429:
+            self.pause(retry_after(response, get_settings().model_pool_cooldown))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "mean_wait": self.wait_total / self.acquired if self.acquired else 0.0,
+            "max_wait": self.wait_max,
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (
+            f"Rate limiter: {stats['acquired']} requests, mean wait {stats['mean_wait']:.2f}s "
+            f"(max {stats['max_wait']:.2f}s), peak queue {stats['max_queue_depth']}, "
+            f"429 pauses {stats['throttled']}"
+        )
+
+
+class RateLimitedModel(Model):
+    """Wraps a backend's Model so every call waits for the limiter and is charged its real token usage.
+
+    429s reach the limiter through the client's response hook (see build_client).
+    """
+
+    def __init__(self, model: Model, limiter: RateLimiter):
+        self.model = model
+        self.limiter = limiter
+
+    def _prompt_tokens(self, system_instructions, input) -> int:
+        text = (system_instructions or "") + (input if isinstance(input, str) else json.dumps(input, default=str))
+        return estimate_tokens(text)
+
+    def _estimate(self, prompt_tokens: int, model_settings) -> int:
+        return prompt_tokens + (model_settings.max_tokens or DEFAULT_OUTPUT_TOKENS)
+
+    async def get_response(self, system_instructions, input, model_settings, *args, **kwargs):
+        estimated = self._estimate(self._prompt_tokens(system_instructions, input), model_settings)
+        await self.limiter.acquire(estimated)
+        try:
+            response = await self.model.get_response(system_instructions, input, model_settings, *args, **kwargs)
+        except BaseException:
+            # Rejected, failed or cancelled before an answer: don't keep its tokens charged
+            self.limiter.settle(estimated, 0)
+            raise
+        self.limiter.settle(estimated, response.usage.total_tokens)
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, *args, **kwargs):
+        prompt_tokens = self._prompt_tokens(system_instructions, input)
+        estimated = self._estimate(prompt_tokens, model_settings)
+        await self.limiter.acquire(estimated)
+        settled = False
+        # Nothing is spent until the stream starts; from then on the prompt plus what has streamed
+        spent = 0
+        output_chars = 0
+        try:
+            async for event in self.model.stream_response(system_instructions, input, model_settings, *args, **kwargs):
+                kind = getattr(event, "type", "")
+                if kind == "response.completed" and event.response.usage is not None:
+                    self.limiter.settle(estimated, event.response.usage.total_tokens)
+                    settled = True
+                elif kind == "response.output_text.delta":
+                    output_chars += len(event.delta)
+                spent = prompt_tokens + output_chars // 4
+                yield event
+        finally:
+            # Errors, a lost hedge or a client disconnect (CancelledError) refund only the unused part
+            if not settled:
+                self.limiter.settle(estimated, spent)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter | None:
+    """The limiter for the GEMINI_* endpoint, or None when MODEL_RPM and MODEL_TPM are both unset"""
+    settings = get_settings()
+    if not settings.model_rpm and not settings.model_tpm:
+        return None
+    return RateLimiter(settings.model_rpm, settings.model_tpm)
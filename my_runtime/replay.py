@@ -0,0 +1,290 @@
+import asyncio
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+from my_config.settings import get_settings
+
+# Bump when the cassette layout changes
+_FORMAT = 1
+
+# Response headers worth keeping: enough for the client to parse the body and honour back-off
+_KEEP_HEADERS = ("content-type", "retry-after")
+
+# Query parameters that carry credentials and must never be written to a cassette
+_SECRET_PARAMS = {"key", "api_key", "apikey", "token"}
+
+
+class ReplayMiss(httpx.TransportError):
+    """Replay has no recorded exchange left for a request"""
+
+
+def _text(chunk: bytes) -> str:
+    # surrogateescape round-trips bytes that aren't valid UTF-8 (e.g. a split multi-byte character)
+    return chunk.decode("utf-8", "surrogateescape")
+
+
+def _bytes(text: str) -> bytes:
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _describe(channel: str, request: httpx.Request) -> dict:
+    """Request fields used to find its recording again, with credentials stripped"""
+    query = [(k, v) for k, v in parse_qsl(request.url.query.decode()) if k.lower() not in _SECRET_PARAMS]
+    body = request.content.decode("utf-8", "replace") if request.content else ""
+    try:
+        parsed = json.loads(body) if body else None
+    except ValueError:
+        parsed = None
+    canonical = json.dumps(parsed, sort_keys=True) if parsed is not None else body
+    key = f"{channel} {request.method} {request.url.path}?{urlencode(sorted(query))} {canonical}"
+    if channel == "model" and isinstance(parsed, dict):
+        # Same agent asking the same question, even if instructions or history changed
+        tools = sorted(tool.get("function", {}).get("name", "") for tool in parsed.get("tools") or [])
+        users = [m.get("content") for m in parsed.get("messages", []) if m.get("role") == "user"]
+        shape = json.dumps([tools, users[-1] if users else None], sort_keys=True, default=str)
+    else:
+        shape = json.dumps(sorted(query))
+    return {
+        "method": request.method,
+        "path": request.url.path,
+        "query": urlencode(query),
+        "key": hashlib.sha256(key.encode()).hexdigest()[:24],
+        "shape": hashlib.sha256(f"{channel} {request.url.path} {shape}".encode()).hexdigest()[:24],
+    }
+
+
+class Cassette:
+    """The HTTP exchanges and run summaries of one recorded session, stored as gzipped JSON lines"""
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.exchanges = []
+        self.runs = []
+        self.meta = {"format": _FORMAT, "created": time.time()}
+        self._lock = threading.Lock()
+        self._used = set()
+        self.origin = time.perf_counter()
+        self.exact = 0
+        self.fuzzy = 0
+        self.fallback = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette = cls(path)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                kind = entry.pop("kind")
+                if kind == "meta":
+                    if entry.get("format") != _FORMAT:
+                        raise ValueError(f"{path}: cassette format {entry.get('format')}, expected {_FORMAT}")
+                    cassette.meta = entry
+                elif kind == "exchange":
+                    cassette.exchanges.append(entry)
+                elif kind == "run":
+                    cassette.runs.append(entry)
+        return cassette
+
+    def save(self, path: str | None = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            lines = [{"kind": "meta", **self.meta, "exchanges": len(self.exchanges), "runs": len(self.runs)}]
+            lines += [{"kind": "exchange", **exchange} for exchange in self.exchanges]
+            lines += [{"kind": "run", **run} for run in self.runs]
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
+
+    # Recording ----------------------------------------------------------
+
+    def add_exchange(self, exchange: dict) -> None:
+        with self._lock:
+            self.exchanges.append(exchange)
+
+    def add_run(self, prompt: str, record: dict) -> None:
+        keep = ("duration", "time_to_first_token", "events", "agent_chain", "usage", "error")
+        with self._lock:
+            self.runs.append({"prompt": prompt, **{key: record.get(key) for key in keep}})
+
+    # Replay -------------------------------------------------------------
+
+    def match(self, channel: str, request_info: dict) -> dict:
+        """The recorded exchange for a request: same bytes, else same shape, else next in order"""
+        with self._lock:
+            candidates = [
+                (i, exchange) for i, exchange in enumerate(self.exchanges)
+                if i not in self._used and exchange["channel"] == channel
+            ]
+            for field, counter in (("key", "exact"), ("shape", "fuzzy")):
+                found = next((i for i, exchange in candidates if exchange[field] == request_info[field]), None)
+                if found is not None:
+                    break
+            else:
+                found, counter = (candidates[0][0], "fallback") if candidates else (None, "misses")
+            setattr(self, counter, getattr(self, counter) + 1)
+            if found is None:
+                raise ReplayMiss(f"no recorded {channel} exchange left for {request_info['method']} {request_info['path']}")
+            self._used.add(found)
+            return self.exchanges[found]
+
+    def unused(self) -> int:
+        return len(self.exchanges) - len(self._used)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._used.clear()
+            self.exact = self.fuzzy = self.fallback = self.misses = 0
+
+    def summary(self) -> str:
+        return (
+            f"Replay {self.exact} exact, {self.fuzzy} by shape, {self.fallback} in order, "
+            f"{self.misses} missing, {self.unused()} unused of {len(self.exchanges)}"
+        )
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, started: float, on_close):
+        self._stream = stream
+        self._started = started
+        self._on_close = on_close
+        self.chunks = []
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self.chunks.append([round(time.perf_counter() - self._started, 4), _text(chunk)])
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._on_close(self.chunks)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through and writes each exchange, with its chunk timings, to the cassette"""
+
+    def __init__(self, cassette: Cassette, channel: str, inner: httpx.AsyncBaseTransport):
+        self.cassette = cassette
+        self.channel = channel
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Uncompressed bodies keep the cassette readable and let gzip do the compressing once
+        request.headers["Accept-Encoding"] = "identity"
+        info = _describe(self.channel, request)
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        headers_at = round(time.perf_counter() - started, 4)
+        exchange = {
+            "channel": self.channel,
+            **info,
+            "at": round(started - self.cassette.origin, 4),
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in _KEEP_HEADERS if name in response.headers},
+            "headers_at": headers_at,
+        }
+
+        def finished(chunks):
+            self.cassette.add_exchange({**exchange, "chunks": chunks})
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, finished),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list, headers_at: float, speed: float):
+        self._chunks = chunks
+        self._previous = headers_at
+        self._speed = speed
+
+    async def __aiter__(self):
+        for offset, text in self._chunks:
+            if self._speed:
+                await asyncio.sleep(max(0.0, offset - self._previous) * self._speed)
+            self._previous = offset
+            yield _bytes(text)
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests from the active cassette, reproducing the recorded timings times `speed`"""
+
+    def __init__(self, channel: str, speed: float = 1.0):
+        self.channel = channel
+        self.speed = speed
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cassette = active_cassette()
+        if cassette is None:
+            raise ReplayMiss("replay mode without a loaded cassette")
+        exchange = cassette.match(self.channel, _describe(self.channel, request))
+        if self.speed:
+            await asyncio.sleep(exchange["headers_at"] * self.speed)
+        return httpx.Response(
+            exchange["status"],
+            headers=exchange["headers"],
+            stream=_ReplayStream(exchange["chunks"], exchange["headers_at"], self.speed),
+            request=request,
+        )
+
+
+_active = None
+_active_lock = threading.Lock()
+
+
+def active_cassette() -> Cassette | None:
+    """The cassette being recorded or replayed (loaded from REPLAY_FILE on first use)"""
+    global _active
+    with _active_lock:
+        if _active is None:
+            settings = get_settings()
+            if settings.replay_mode == "record":
+                _active = Cassette(settings.replay_file)
+                atexit.register(_active.save)
+            elif settings.replay_mode == "replay" and os.path.exists(settings.replay_file):
+                _active = Cassette.load(settings.replay_file)
+        return _active
+
+
+def use_cassette(cassette: Cassette | None) -> None:
+    """Make `cassette` the one replay transports answer from (the regression runner swaps these)"""
+    global _active
+    with _active_lock:
+        _active = cassette
+
+
+def recording() -> Cassette | None:
+    """The cassette runs should be written to, or None when not recording"""
+    return active_cassette() if get_settings().replay_mode == "record" else None
+
+
+def transport_for(channel: str, limits: httpx.Limits | None = None):
+    """Transport for an HTTP client on `channel` ("model" or "weather"); None means the default one"""
+    settings = get_settings()
+    if settings.replay_mode == "replay":
+        return ReplayTransport(channel, settings.replay_speed)
+    if settings.replay_mode == "record":
+        inner = httpx.AsyncHTTPTransport(limits=limits) if limits else httpx.AsyncHTTPTransport()
+        return RecordingTransport(active_cassette(), channel, inner)
+    return None
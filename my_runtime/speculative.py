@@ -0,0 +1,210 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+
+from agents import Runner
+
+from handoff_agent.handoffs import handoff_targets
+from my_runtime.memory import estimate_tokens
+
+# End of a speculative run's event stream
+_DONE = object()
+
+
+@dataclass
+class SpeculationStats:
+    runs: int = 0
+    started: int = 0
+    hits: int = 0
+    misses: int = 0
+    capped: int = 0
+    seconds_saved: float = 0.0
+    extra_tokens: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"Speculation {self.hits}/{self.runs} hits, {self.seconds_saved:.2f}s saved, "
+            f"~{self.extra_tokens} extra tokens over {self.started - self.hits} discarded runs"
+            + (f" ({self.capped} stopped at the cap)" if self.capped else "")
+        )
+
+
+speculation_stats = SpeculationStats()
+
+
+def _input_text(run_input) -> str:
+    if isinstance(run_input, str):
+        return run_input
+    return " ".join(str(item.get("content", "")) for item in run_input if isinstance(item, dict))
+
+
+class _Speculation:
+    """One specialist started on the prompt before triage has decided.
+
+    Its events are buffered by a pump task so they can be replayed the moment triage picks it;
+    the pump also keeps a running token estimate and stops the run at its share of the cap.
+    """
+
+    def __init__(self, agent, run_input, run_config, budget: int):
+        self.agent = agent
+        self.budget = budget
+        self.capped = False
+        self.input_tokens = estimate_tokens(f"{agent.instructions}\n{_input_text(run_input)}")
+        self.completed_tokens = 0
+        self.partial_chars = 0
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.result = Runner.run_streamed(agent, run_input, run_config=run_config)
+        self.events = asyncio.Queue()
+        self._pump = asyncio.create_task(self._run())
+
+    def spent(self) -> int:
+        """Tokens this run has cost so far (exact for finished responses, estimated for the one in flight)"""
+        in_flight = 0 if self.result.is_complete else self.input_tokens + self.partial_chars // 4
+        return self.completed_tokens + in_flight
+
+    async def _run(self) -> None:
+        try:
+            async for event in self.result.stream_events():
+                if event.type == "raw_response_event":
+                    kind = getattr(event.data, "type", "")
+                    if kind == "response.output_text.delta":
+                        self.partial_chars += len(event.data.delta)
+                        if self.first_token_at is None:
+                            self.first_token_at = time.perf_counter()
+                    elif kind == "response.completed":
+                        usage = event.data.response.usage
+                        self.completed_tokens += usage.total_tokens if usage else self.input_tokens
+                        self.partial_chars = 0
+                self.events.put_nowait(event)
+                if self.spent() > self.budget:
+                    self.capped = True
+                    self.result.cancel()
+                    break
+        except Exception as e:
+            self.events.put_nowait(e)
+        finally:
+            self.events.put_nowait(_DONE)
+
+    async def replay(self):
+        while True:
+            event = await self.events.get()
+            if event is _DONE:
+                return
+            if isinstance(event, Exception):
+                raise event
+            yield event
+
+    def cancel(self) -> int:
+        """Stop the run and return what it cost"""
+        self.result.cancel()
+        self._pump.cancel()
+        return self.spent()
+
+
+class SpeculativeRun:
+    """Triage plus head-started candidate specialists behind the RunResultStreaming interface.
+
+    Events come from triage until it calls a handoff tool. If the target is a candidate, triage
+    is cancelled and the candidate's buffered events follow, so its first tokens are often
+    already there; every other candidate is cancelled right away. When triage picks someone
+    else, or answers itself, the speculative runs are dropped and triage carries on as usual.
+    """
+
+    def __init__(self, triage, candidates: list, run_input, run_config, max_tokens: int, stats=speculation_stats):
+        self.stats = stats
+        self._triage = Runner.run_streamed(triage, run_input, run_config=run_config)
+        self._targets = handoff_targets(triage)
+        budget = max_tokens // max(1, len(candidates))
+        self._pending = {
+            agent.name: _Speculation(agent, run_input, run_config, budget) for agent in candidates
+        }
+        self._winner = None
+        stats.runs += 1
+        stats.started += len(self._pending)
+
+    @property
+    def _result(self):
+        return self._winner.result if self._winner else self._triage
+
+    @property
+    def final_output(self):
+        return self._result.final_output
+
+    @property
+    def last_agent(self):
+        return self._result.last_agent
+
+    @property
+    def context_wrapper(self):
+        return self._result.context_wrapper
+
+    @property
+    def is_complete(self) -> bool:
+        return self._result.is_complete
+
+    def _discard(self, keep: str | None = None) -> None:
+        for name, speculation in list(self._pending.items()):
+            if name == keep:
+                continue
+            del self._pending[name]
+            self.stats.capped += speculation.capped
+            self.stats.extra_tokens += speculation.cancel()
+
+    def _head_start(self, handed_off: float) -> float:
+        """How much sooner the winner's first token came than if it had started at the handoff.
+
+        Started at the handoff, it would have taken as long to its first token as it did here,
+        landing at handed_off + (first_token_at - started_at); speculating, that token is shown
+        at max(first_token_at, handed_off). The difference is min(first_token_at, handed_off) - started_at.
+        """
+        winner = self._winner
+        return max(0.0, min(winner.first_token_at, handed_off) - winner.started_at)
+
+    async def stream_events(self):
+        try:
+            async for event in self._triage.stream_events():
+                yield event
+                if event.type != "run_item_stream_event" or event.item.type != "handoff_call_item":
+                    continue
+                target = self._targets.get(getattr(event.item.raw_item, "name", None))
+                chosen = self._pending.get(target)
+                if chosen is None or chosen.capped:
+                    self.stats.misses += 1
+                    self._discard()
+                    continue
+                self._discard(keep=target)
+                self._triage.cancel()
+                self._winner = self._pending.pop(target)
+                # The cap only applies to runs that may be thrown away
+                self._winner.budget = math.inf
+                self.stats.hits += 1
+                handed_off = time.perf_counter()
+                # Triage's one response still counts towards the run
+                self._winner.result.context_wrapper.usage.add(self._triage.context_wrapper.usage)
+                counted = False
+                async for event in self._winner.replay():
+                    if not counted and self._winner.first_token_at is not None:
+                        counted = True
+                        self.stats.seconds_saved += self._head_start(handed_off)
+                    yield event
+                return
+            # Triage answered without handing off
+            if self._pending:
+                self.stats.misses += 1
+        finally:
+            self._discard()
+
+    def cancel(self) -> None:
+        self._discard()
+        self._triage.cancel()
+        if self._winner:
+            self._winner.cancel()
+
+
+def run_streamed(starting_agent, run_input, run_config, candidates=(), max_tokens: int = 0):
+    """Runner.run_streamed, or a SpeculativeRun when there are candidates to start alongside triage"""
+    if not candidates:
+        return Runner.run_streamed(starting_agent=starting_agent, input=run_input, run_config=run_config)
+    return SpeculativeRun(starting_agent, list(candidates), run_input, run_config, max_tokens)
@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import time
+
+from my_runtime.profiling import active_profiler
+
+
+class StreamRenderer:
+    """Buffers streamed text deltas and writes them to the terminal in batches.
+
+    Deltas are collected in a list (joined once at the end) and stdout is only
+    flushed when `flush_chars` characters are pending or `flush_interval`
+    seconds have passed, instead of one write + flush per token. A loop timer
+    covers the interval, so text still goes out when the stream pauses.
+    """
+
+    def __init__(self, out=None, flush_chars: int = 256, flush_interval: float = 0.05):
+        self.out = out or sys.stdout
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self._timer = None
+        self.reset()
+
+    def reset(self) -> None:
+        self._cancel_timer()
+        self._parts = []
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.perf_counter()
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.deltas = 0
+        self.chars = 0
+
+    def write(self, delta: str) -> None:
+        """Add one streamed text delta"""
+        if not delta:
+            return
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        self.deltas += 1
+        self.chars += len(delta)
+        self._parts.append(delta)
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+        if self._pending_chars >= self.flush_chars or now - self._last_flush >= self.flush_interval:
+            self.flush()
+        elif self._timer is None:
+            self._schedule_flush(self.flush_interval - (now - self._last_flush))
+
+    def _schedule_flush(self, delay: float) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside an event loop the next write or finish() flushes
+            return
+        self._timer = loop.call_later(delay, self.flush)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def echo(self, *args, **kwargs) -> None:
+        """print() that first writes out any buffered deltas so output stays in order"""
+        self.flush()
+        print(*args, file=self.out, flush=True, **kwargs)
+
+    def flush(self) -> None:
+        self._cancel_timer()
+        started = time.perf_counter()
+        if self._pending:
+            self.out.write("".join(self._pending))
+            self._pending.clear()
+            self._pending_chars = 0
+        self.out.flush()
+        self._last_flush = time.perf_counter()
+        profiler = active_profiler()
+        if profiler is not None:
+            profiler.add_io(self._last_flush - started)
+
+    def finish(self) -> None:
+        self.flush()
+        self.finished_at = time.perf_counter()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Streamed deltas per second after the first one (each delta is roughly one token)"""
+        end = self.finished_at or time.perf_counter()
+        if self.first_token_at is None or self.deltas < 2 or end <= self.first_token_at:
+            return 0.0
+        # The window opens at the first delta, so it isn't counted
+        return (self.deltas - 1) / (end - self.first_token_at)
+
+    def stats_line(self) -> str:
+        ttft = self.time_to_first_token
+        ttft_text = f"{ttft:.2f}s" if ttft is not None else "n/a"
+        return f"TTFT {ttft_text}, {self.tokens_per_second:.1f} tokens/s, {self.chars} characters"
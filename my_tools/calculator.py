@@ -0,0 +1,234 @@
+import ast
+import math
+import operator
+import re
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+MAX_EXPRESSION_LENGTH = 500
+# Results past this many bits are refused instead of tying up the process
+MAX_RESULT_BITS = 100_000
+MAX_FACTORIAL = 5_000
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions the calculator refuses or cannot evaluate"""
+
+
+def _sqrt(x):
+    if x < 0:
+        raise CalculatorError("square root of a negative number")
+    if isinstance(x, int) or (isinstance(x, Fraction) and x.denominator == 1):
+        root = math.isqrt(int(x))
+        if root * root == x:
+            return root
+    return math.sqrt(x)
+
+
+def _factorial(x):
+    if x != int(x) or x < 0:
+        raise CalculatorError("factorial is only defined for non-negative integers")
+    if x > MAX_FACTORIAL:
+        raise CalculatorError(f"factorial argument above {MAX_FACTORIAL}")
+    return math.factorial(int(x))
+
+
+def _log(x, base=None):
+    if x <= 0:
+        raise CalculatorError("logarithm of a non-positive number")
+    return math.log(x) if base is None else math.log(x, base)
+
+
+FUNCTIONS = {
+    "abs": abs,
+    "sqrt": _sqrt,
+    "round": round,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "factorial": _factorial,
+    "gcd": math.gcd,
+    "lcm": math.lcm,
+    "log": _log,
+    "ln": _log,
+    "log10": lambda x: _log(x, 10),
+    "log2": lambda x: _log(x, 2),
+    "exp": math.exp,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "min": min,
+    "max": max,
+}
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+}
+
+
+def _power(base, exponent):
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        exponent = int(exponent)
+    if isinstance(exponent, int) and isinstance(base, (int, Fraction)):
+        if base not in (0, 1, -1):
+            numerator = abs(base.numerator if isinstance(base, Fraction) else base)
+            denominator = base.denominator if isinstance(base, Fraction) else 1
+            bits = max(numerator, denominator).bit_length() * abs(exponent)
+            if bits > MAX_RESULT_BITS:
+                raise CalculatorError("result too large")
+        if exponent < 0:
+            if base == 0:
+                raise CalculatorError("division by zero")
+            return Fraction(1) / Fraction(base) ** -exponent
+        return base ** exponent
+    result = float(base) ** float(exponent)
+    if isinstance(result, complex):
+        raise CalculatorError("complex results are not supported")
+    return result
+
+
+def _divide(a, b):
+    if b == 0:
+        raise CalculatorError("division by zero")
+    if isinstance(a, float) or isinstance(b, float):
+        return a / b
+    return Fraction(a) / Fraction(b)
+
+
+def _floordiv(a, b):
+    if b == 0:
+        raise CalculatorError("division by zero")
+    return a // b
+
+
+def _mod(a, b):
+    if b == 0:
+        raise CalculatorError("modulo by zero")
+    return a % b
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _divide,
+    ast.FloorDiv: _floordiv,
+    ast.Mod: _mod,
+    ast.Pow: _power,
+    # Users write ^ for powers far more often than they mean XOR
+    ast.BitXor: _power,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _number(value):
+    """Keep literals exact: ints stay ints, decimal literals become Fractions"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CalculatorError(f"unsupported literal {value!r}")
+    if isinstance(value, float):
+        return Fraction(Decimal(repr(value)))
+    return value
+
+
+def _eval(node):
+    if isinstance(node, ast.Expression):
+        return _eval(node.body)
+    if isinstance(node, ast.Constant):
+        return _number(node.value)
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        result = BINARY_OPERATORS[type(node.op)](_eval(node.left), _eval(node.right))
+        if isinstance(result, int) and result.bit_length() > MAX_RESULT_BITS:
+            raise CalculatorError("result too large")
+        return result
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](_eval(node.operand))
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in FUNCTIONS
+        and not node.keywords
+    ):
+        args = [_eval(arg) for arg in node.args]
+        try:
+            return FUNCTIONS[node.func.id](*args)
+        except (TypeError, ValueError, OverflowError) as e:
+            if isinstance(e, CalculatorError):
+                raise
+            raise CalculatorError(f"{node.func.id}: {e}") from None
+    raise CalculatorError(f"unsupported syntax: {ast.dump(node)[:40]}")
+
+
+def _prepare(expression: str) -> str:
+    expression = expression.strip().rstrip("=").strip()
+    expression = expression.replace("×", "*").replace("÷", "/").replace("−", "-")
+    # "12,345" style thousands separators
+    return re.sub(r"(?<=\d),(?=\d{3}\b)", "", expression)
+
+
+def evaluate(expression: str):
+    """Safely evaluate an arithmetic expression without eval()"""
+    expression = _prepare(expression)
+    if not expression:
+        raise CalculatorError("empty expression")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculatorError("expression too long")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        raise CalculatorError("invalid expression") from None
+    try:
+        return _eval(tree)
+    except (OverflowError, ZeroDivisionError) as e:
+        raise CalculatorError(str(e)) from None
+
+
+def format_result(value) -> str:
+    """Render a result exactly where possible (ints, fractions with their decimal value)"""
+    if isinstance(value, Fraction):
+        if value.denominator == 1:
+            return str(value.numerator)
+        with localcontext() as ctx:
+            ctx.prec = 28
+            decimal = Decimal(value.numerator) / Decimal(value.denominator)
+        text = format(decimal.normalize(), "f")
+        # Terminating decimals are exact; otherwise show the fraction as well
+        exact = Fraction(decimal) == value
+        return text if exact else f"{text} ({value})"
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e16:
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def calculate_expression(expression: str) -> str:
+    try:
+        return format_result(evaluate(expression))
+    except CalculatorError as e:
+        return f"Error: {e}"
+
+
+# "what is 2+2?", "calculate (3+4)*5", "15 * 25 =" ...
+_PROMPT_PREFIX = re.compile(
+    r"^\s*(please\s+)?(what('?s| is)|calculate|compute|evaluate|solve|how much is)\s*:?\s*",
+    re.IGNORECASE,
+)
+_ARITHMETIC_ONLY = re.compile(r"^[\d\s.,+\-*/%^()×÷−=]+$")
+
+
+def evaluate_prompt(prompt: str):
+    """Answer a prompt that is nothing but arithmetic, or return None to let the model handle it"""
+    expression = _PROMPT_PREFIX.sub("", prompt).strip().rstrip("?").strip()
+    if not _ARITHMETIC_ONLY.match(expression) or not re.search(r"\d\s*[-+*/%^×÷−]", expression):
+        return None
+    try:
+        return _prepare(expression), format_result(evaluate(expression))
+    except CalculatorError:
+        return None
@@ -0,0 +1,108 @@
+import math
+import random
+import statistics
+
+from my_tools.calculator import CalculatorError
+
+# Larger inputs are refused outright; hard semiprimes below this are cut off by the tool timeout
+MAX_FACTOR_DIGITS = 60
+MAX_STATS_VALUES = 1_000_000
+
+_SMALL_PRIMES = [p for p in range(2, 1000) if all(p % d for d in range(2, math.isqrt(p) + 1))]
+# Deterministic Miller-Rabin witnesses for n < 3.3e24; beyond that it is probabilistic
+_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_probable_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    for p in _SMALL_PRIMES[:12]:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in _WITNESSES:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_brent(n: int) -> int:
+    """A non-trivial factor of the odd composite n"""
+    rng = random.Random(n)
+    while True:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factorize(n: int) -> list[int]:
+    """Prime factors of n in ascending order, with multiplicity"""
+    if n < 1:
+        raise CalculatorError("factorize needs a positive integer")
+    if len(str(n)) > MAX_FACTOR_DIGITS:
+        raise CalculatorError(f"numbers above {MAX_FACTOR_DIGITS} digits are not factorized")
+    factors = []
+    for p in _SMALL_PRIMES:
+        while n % p == 0:
+            factors.append(p)
+            n //= p
+    stack = [n] if n > 1 else []
+    while stack:
+        m = stack.pop()
+        if is_probable_prime(m):
+            factors.append(m)
+            continue
+        d = _pollard_brent(m)
+        stack += [d, m // d]
+    return sorted(factors)
+
+
+def describe(values: list[float]) -> dict:
+    """Summary statistics of a sample"""
+    if not values:
+        raise CalculatorError("statistics need at least one value")
+    if len(values) > MAX_STATS_VALUES:
+        raise CalculatorError(f"at most {MAX_STATS_VALUES} values")
+    result = {
+        "count": len(values),
+        "mean": float(statistics.fmean(values)),
+        "median": float(statistics.median(values)),
+        "min": min(values),
+        "max": max(values),
+    }
+    if len(values) > 1:
+        # statistics.variance sums exactly internally, so large samples don't drift
+        result["stdev"] = math.sqrt(statistics.variance(values))
+        result["quartiles"] = [float(q) for q in statistics.quantiles(values, n=4)]
+    modes = statistics.multimode(values)
+    if len(modes) < len(values):
+        result["mode"] = modes
+    return result
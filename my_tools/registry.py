@@ -0,0 +1,183 @@
+import atexit
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from my_config.settings import get_settings
+
+# Bump when the cached entry layout changes
+_CACHE_FORMAT = 1
+
+
+def _source_hash(func) -> str:
+    """Hash of the tool's source (innermost function) plus the SDK version that shaped its schema"""
+    import agents
+
+    inner = inspect.unwrap(func)
+    try:
+        source = inspect.getsource(inner)
+    except (OSError, TypeError):
+        source = f"{inner.__module__}.{inner.__qualname__}{inspect.signature(inner)}"
+    text = f"{_CACHE_FORMAT}|{getattr(agents, '__version__', '')}|{source}"
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class SchemaCache:
+    """JSON file of tool name/description/parameter schema keyed by source hash"""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+        self._flush_registered = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError):
+                    # A corrupt cache only costs a rebuild
+                    self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._load()[key] = entry
+            self._dirty = True
+            # Written once at exit rather than on import; pool workers leave it to the parent
+            if not self._flush_registered and multiprocessing.parent_process() is None:
+                self._flush_registered = True
+                atexit.register(self.flush)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, indent=1, sort_keys=True)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError:
+                pass
+
+
+class ToolRegistry:
+    """Every tool is defined once here and picked by name or tag.
+
+    Schemas come from the on-disk cache when the tool's source is unchanged, so importing
+    the tools skips pydantic; the validation model is only built on a tool's first call.
+    """
+
+    def __init__(self, cache: SchemaCache):
+        self.cache = cache
+        self._tools = {}
+        self._tags = {}
+        self.schema_seconds = 0.0
+        # Validation models a cache hit put off until each tool's first call
+        self.deferred_seconds = 0.0
+
+    def tool(self, *tags: str, name: str | None = None):
+        """Decorator replacing @function_tool: registers the function and returns its FunctionTool"""
+
+        def decorate(func):
+            tool = self._build(func, name or func.__name__)
+            self._tools[tool.name] = tool
+            self._tags[tool.name] = set(tags)
+            return tool
+
+        return decorate
+
+    def _build(self, func, name: str):
+        from agents import FunctionTool
+
+        started = time.perf_counter()
+        key = f"{name}:{_source_hash(func)}"
+        entry = self.cache.get(key)
+        if entry is None:
+            # Cold: the SDK tool is built now anyway, so use it as is and cache its schema
+            sdk_tool = self._sdk_tool(func, name)
+            self.cache.put(key, {"description": sdk_tool.description, "params_json_schema": sdk_tool.params_json_schema})
+            self.schema_seconds += time.perf_counter() - started
+            return sdk_tool
+        self.schema_seconds += time.perf_counter() - started
+
+        return FunctionTool(
+            name=name,
+            description=entry["description"],
+            params_json_schema=entry["params_json_schema"],
+            on_invoke_tool=self._invoker(func, name),
+            strict_json_schema=True,
+        )
+
+    @staticmethod
+    def _sdk_tool(func, name: str):
+        from agents import function_tool
+
+        return function_tool(func, name_override=name, strict_mode=True)
+
+    def _invoker(self, func, name: str):
+        """Hands calls to the SDK's own @function_tool, built on first use, so parsing and error reporting stay the SDK's"""
+        sdk_tool = None
+
+        async def invoke(ctx, input: str):
+            nonlocal sdk_tool
+            if sdk_tool is None:
+                started = time.perf_counter()
+                sdk_tool = self._sdk_tool(func, name)
+                self.deferred_seconds += time.perf_counter() - started
+            return await sdk_tool.on_invoke_tool(ctx, input)
+
+        return invoke
+
+    def get(self, name: str):
+        return self._tools[name]
+
+    def select(self, names=None, tags=None) -> list:
+        """Tools whose name is in `names` or that carry any of `tags`, in registration order"""
+        names, tags = set(names or ()), set(tags or ())
+        unknown = names - self._tools.keys()
+        if unknown:
+            raise KeyError(f"unknown tools: {', '.join(sorted(unknown))}")
+        return [tool for tool_name, tool in self._tools.items() if tool_name in names or self._tags[tool_name] & tags]
+
+    def names(self) -> list:
+        return list(self._tools)
+
+    def flush(self) -> None:
+        self.cache.flush()
+
+
+def _cache_path() -> str | None:
+    path = get_settings().tool_schema_cache
+    if path.lower() == "off":
+        return None
+    if path:
+        return path
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "thursday-class-assignments", "tool_schemas.json")
+
+
+registry = ToolRegistry(SchemaCache(_cache_path()))
+tool = registry.tool
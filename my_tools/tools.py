@@ -1,33 +1,52 @@
-from agents import function_tool
-import requests
+import asyncio
 
-from assig4 import WEATHER_API_KEY
+from my_runtime.executors import cpu_bound
+from my_runtime.metrics import timed_tool
+from my_tools.calculator import CalculatorError, calculate_expression
+from my_tools.heavy_math import describe, factorize
+from my_tools.registry import registry, tool
+from my_tools.weather import fetch_current_weather
+from my_tools.weather_cache import get_weather_cache
 
-@function_tool
+@tool("math", "arithmetic")
+@timed_tool
 def add_numbers(a: int, b: int):
     result = a + b
     print("add_numbers function called")
     return result       
 
-@function_tool
-def get_weather(city: str) -> str:
-    url = f"https://api.weatherapi.com/v1/current.json?key={WEATHER_API_KEY}&q={city}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
+async def _describe_weather(city: str) -> str:
+    data = await get_weather_cache().get_or_fetch(city, fetch_current_weather)
+    if data is not None:
         temp = data["current"]["temp_c"]
         condition = data["current"]["condition"]["text"]
-        print("get_weather function called")
         return f"It's {temp}°C and {condition} in {city}."
-    
-    return "Error fetching weather data."
-@function_tool
+    return f"Error fetching weather data for {city}."
+
+@tool("weather")
+@timed_tool
+async def get_weather(city: str) -> str:
+    result = await _describe_weather(city)
+    print("get_weather function called")
+    return result
+
+@tool("weather")
+@timed_tool
+async def get_weather_many(cities: list[str]) -> list[str]:
+    """Current weather for several cities at once, fetched concurrently. Returns one line per city, in order."""
+    # Repeated or aliased cities share one request through the weather cache
+    results = await asyncio.gather(*(_describe_weather(city) for city in cities))
+    print("get_weather_many function called")
+    return list(results)
+@tool("math", "arithmetic")
+@timed_tool
 def subtract(a: int, b: int) -> int:
     result = a - b
     print("subtract function called")
     return result
 
-@function_tool
+@tool("math", "arithmetic")
+@timed_tool
 def multiply(a: int, b: int) -> int:
     result = a * b
     print("multiply function called")
@@ -35,11 +54,48 @@ def multiply(a: int, b: int) -> int:
 
 from typing import Union
 
-@function_tool
+@tool("math", "arithmetic")
+@timed_tool
 def divide(a: int, b: int) -> Union[float, str]:
     if b == 0:
         print("divide function called with zero divisor")
         return "Error: Division by zero is not allowed."
     result = a / b
     print("divide function called")
-    return result
\ No newline at end of file
+    return result
+
+@tool("math")
+@timed_tool
+def calculate(expressions: list[str]) -> list[str]:
+    """Evaluate one or more arithmetic expressions exactly, e.g. ["(3+4)*5/2", "2**100", "sqrt(2)"].
+    Supports + - * / // % ** (or ^), parentheses, pi, e and abs, sqrt, round, floor, ceil,
+    factorial, gcd, lcm, log, ln, exp, sin, cos, tan, min, max. Returns one result per expression."""
+    results = [calculate_expression(expression) for expression in expressions]
+    print("calculate function called")
+    return results
+
+# Heavy math runs in the process pool (TOOL_PROCESS_WORKERS) so it can't stall other sessions
+
+@tool("math", "heavy")
+@timed_tool
+@cpu_bound
+def factorize_integer(number: str) -> str:
+    """Prime factorization of a positive integer (up to 60 digits), given as a decimal string."""
+    try:
+        factors = factorize(int(number.replace(",", "").replace("_", "").strip()))
+    except (ValueError, CalculatorError) as e:
+        return f"Error: {e}"
+    powers = {}
+    for factor in factors:
+        powers[factor] = powers.get(factor, 0) + 1
+    return " × ".join(f"{p}^{k}" if k > 1 else str(p) for p, k in powers.items()) or "1"
+
+@tool("math", "heavy")
+@timed_tool
+@cpu_bound
+def statistics_summary(values: list[float]) -> dict:
+    """Count, mean, median, min, max, sample standard deviation, quartiles and mode of a list of numbers."""
+    try:
+        return describe(values)
+    except CalculatorError as e:
+        return {"error": str(e)}
@@ -0,0 +1,67 @@
+import asyncio
+import random
+
+import httpx
+
+from my_config.settings import get_settings
+from my_runtime.replay import transport_for
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# One pooled client + semaphore per event loop (asyncio.run creates a new loop each time)
+_pools = {}
+
+
+def _get_pool():
+    """Return the shared (client, semaphore) pair for the running event loop"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool[0].is_closed:
+        settings = get_settings()
+        limits = httpx.Limits(
+            max_connections=settings.weather_max_connections,
+            max_keepalive_connections=settings.weather_max_connections,
+        )
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.weather_timeout, connect=settings.weather_connect_timeout),
+            limits=limits,
+            transport=transport_for("weather", limits),
+        )
+        pool = (client, asyncio.Semaphore(settings.weather_max_concurrency))
+        # Drop pools whose loop has gone away so we don't leak clients
+        for old_loop in [l for l in _pools if l.is_closed()]:
+            del _pools[old_loop]
+        _pools[loop] = pool
+    return pool
+
+
+async def fetch_current_weather(city: str):
+    """Fetch current conditions for a city, returning the JSON payload or None on failure"""
+    client, semaphore = _get_pool()
+    settings = get_settings()
+    params = {"key": settings.weather_api_key, "q": city}
+
+    for attempt in range(settings.weather_retries + 1):
+        try:
+            async with semaphore:
+                response = await client.get(settings.weather_api_url, params=params)
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code not in RETRY_STATUSES:
+                return None
+        except httpx.TransportError:
+            pass
+
+        if attempt < settings.weather_retries:
+            # Exponential backoff with jitter so parallel sessions don't retry in lockstep
+            delay = settings.weather_backoff * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    return None
+
+
+async def close_weather_client():
+    """Close the pooled client for the running event loop"""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool[0].aclose()
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from my_config.settings import get_settings
+
+# Common nicknames mapped onto the name weatherapi.com resolves best
+CITY_ALIASES = {
+    "nyc": "new york",
+    "new york city": "new york",
+    "ny": "new york",
+    "la": "los angeles",
+    "sf": "san francisco",
+    "ldn": "london",
+    "dc": "washington",
+    "washington dc": "washington",
+    "khi": "karachi",
+    "lhr": "lahore",
+    "isb": "islamabad",
+}
+
+
+def normalize_city(city: str) -> str:
+    """Lower-case, collapse whitespace and strip punctuation so equivalent spellings share a key"""
+    key = " ".join(city.replace(",", " ").replace(".", " ").split()).lower()
+    return CITY_ALIASES.get(key, key)
+
+
+class WeatherCache:
+    """TTL + LRU cache for weather payloads that also coalesces concurrent misses"""
+
+    def __init__(self, ttl: float = 600.0, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def get(self, city: str):
+        """Return a fresh cached payload for the city or None"""
+        key = normalize_city(city)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    def put(self, city: str, data) -> None:
+        key = normalize_city(city)
+        self._entries[key] = (time.monotonic() + self.ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, city: str, fetch):
+        """Serve from cache, otherwise call `fetch(city)` once no matter how many callers are waiting"""
+        data = self.get(city)
+        if data is not None:
+            self.hits += 1
+            return data
+
+        key = normalize_city(city)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        task = asyncio.ensure_future(fetch(key))
+        self._inflight[key] = task
+        try:
+            data = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(key, None)
+
+        # Failed lookups are not cached so the next call retries upstream
+        if data is not None:
+            self.put(key, data)
+        return data
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+_weather_cache = None
+
+
+def get_weather_cache() -> WeatherCache:
+    """Return the process-wide weather cache, sized from settings on first use"""
+    global _weather_cache
+    if _weather_cache is None:
+        settings = get_settings()
+        _weather_cache = WeatherCache(ttl=settings.weather_cache_ttl, maxsize=settings.weather_cache_size)
+    return _weather_cache
@@ -0,0 +1,411 @@
+"""HTTP front-end for the triage system: many users, one event loop, streamed answers over SSE.
+
+    python server.py --port 8000
+    python server.py --mock          # answer from benchmarks/mock_server.py, no API key needed
+    python server.py --profile       # stall watchdog + sampled stacks (PROFILE_FILE), see /healthz
+    curl -N -X POST localhost:8000/v1/chat -d '{"prompt": "weather in Paris?", "session_id": "abc"}'
+
+Endpoints:
+  POST   /v1/chat                 {"prompt", "session_id"?} -> text/event-stream
+  DELETE /v1/sessions/<id>        forget a conversation
+  GET    /healthz                 live stream count, router / pool / limiter / profiler stats
+
+Stream events: session, agent (start or handoff), handoff (transfer call and its context payload),
+delta, tool_call, tool_output, done, error.
+Every connection shares the model client, pool and limiters. Each stream hands events
+to its writer through a bounded queue: bursts of text deltas are coalesced, and a
+client that stops reading for SERVER_SEND_TIMEOUT seconds has its run cancelled.
+SIGINT/SIGTERM stop accepting connections, let live streams finish for
+SERVER_SHUTDOWN_GRACE seconds, then cancel the rest.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import signal
+import sys
+import time
+import uuid
+
+from agents import set_tracing_disabled
+from openai import RateLimitError
+from openai.types.responses import ResponseTextDeltaEvent
+
+from handoff_agent.handoffs import handoff_payload
+from handoff_agent.main import pick_follow_up_agent, pick_starting_agent, speculation_candidates, triage_agent
+from handoff_agent.router import router_stats
+from my_cache.response_cache import get_response_cache
+from my_config.gemini_config import get_model_pool, get_run_config
+from my_config.settings import get_settings
+from my_runtime.executors import shutdown_executors
+from my_runtime.memory import get_context_window, get_session_store
+from my_runtime.metrics import start_run
+from my_runtime.profiling import active_profiler, profiled
+from my_runtime.rate_limit import retry_after
+from my_runtime.speculative import run_streamed, speculation_stats
+from my_tools.calculator import evaluate_prompt
+from my_tools.weather import close_weather_client
+
+set_tracing_disabled(True)
+
+MAX_BODY_BYTES = 64 * 1024
+_NOTHING = object()
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def map_event(event) -> dict | None:
+    """Turn one stream_events() item into a wire event, or None for events clients don't need"""
+    if event.type == "raw_response_event":
+        if isinstance(event.data, ResponseTextDeltaEvent):
+            return {"event": "delta", "text": event.data.delta}
+    elif event.type in ("agent_updated_stream_event", "agent_handoff_event"):
+        agent = getattr(event, "new_agent", None) or getattr(event.data, "to_agent", None)
+        return {"event": "agent", "agent": agent.name}
+    elif event.type == "run_item_stream_event":
+        item = event.item
+        if item.type == "handoff_call_item":
+            return {"event": "handoff", "tool": getattr(item.raw_item, "name", "handoff"),
+                    "context": handoff_payload(item)}
+        if item.type == "tool_call_item":
+            return {"event": "tool_call", "tool": getattr(item.raw_item, "name", "tool")}
+        if item.type == "tool_call_output_item":
+            return {"event": "tool_output", "output": str(item.output)}
+    return None
+
+
+def sse(payload: dict) -> bytes:
+    event = payload.pop("event")
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode()
+
+
+class ChatServer:
+    def __init__(self, host: str, port: int, max_streams: int, queue_size: int,
+                 send_timeout: float, shutdown_grace: float):
+        self.host = host
+        self.port = port
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.shutdown_grace = shutdown_grace
+        self.sessions = get_session_store()
+        self.context_window = get_context_window()
+        self._session_locks = {}
+        self._streams = set()
+        self._connections = set()
+        self._server = None
+        self._closing = False
+        self.served = 0
+        self.rejected = 0
+        self.slow_clients = 0
+
+    # Lifecycle ----------------------------------------------------------
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def shutdown(self):
+        """Stop accepting, give live streams a grace period, then cancel what is left"""
+        self._closing = True
+        self._server.close()
+        if self._streams:
+            print(f"⏳ Waiting up to {self.shutdown_grace:.0f}s for {len(self._streams)} live stream(s)")
+            await asyncio.wait(set(self._streams), timeout=self.shutdown_grace)
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        await close_weather_client()
+        shutdown_executors()
+
+    # HTTP plumbing ------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while not self._closing:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._send_json(writer, 413, {"error": "request body too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = await self._dispatch(method, target.split("?", 1)[0], body, writer)
+                if not keep_alive or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _dispatch(self, method, path, body, writer) -> bool:
+        """Handle one request; returns whether the connection can be reused"""
+        try:
+            if path == "/healthz":
+                await self._send_json(writer, 200, self.health())
+            elif path == "/v1/chat":
+                if method != "POST":
+                    raise HTTPError(405, "use POST")
+                await self._chat(json.loads(body or b"{}"), writer)
+                return False
+            elif path.startswith("/v1/sessions/"):
+                if method != "DELETE":
+                    raise HTTPError(405, "use DELETE")
+                session = self.sessions.load(path.rsplit("/", 1)[1])
+                session.clear()
+                self.sessions.save(session)
+                await self._send_json(writer, 200, {"session_id": session.session_id, "cleared": True})
+            else:
+                raise HTTPError(404, f"no route for {path}")
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except json.JSONDecodeError:
+            await self._send_json(writer, 400, {"error": "body must be JSON"})
+        return True
+
+    async def _send_json(self, writer, status, payload, extra_headers=None):
+        data = json.dumps(payload).encode()
+        headers = "".join(f"{name}: {value}\r\n" for name, value in (extra_headers or {}).items())
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n{headers}\r\n".encode() + data
+        )
+        await writer.drain()
+
+    def health(self) -> dict:
+        return {
+            "status": "closing" if self._closing else "ok",
+            "live_streams": len(self._streams),
+            "served": self.served,
+            "rejected": self.rejected,
+            "slow_clients": self.slow_clients,
+            "router": router_stats.summary(),
+            "speculation": speculation_stats.summary(),
+            "model_pool": get_model_pool().snapshot(),
+            "rate_limits": [limiter.stats() for limiter in get_model_pool().limiters()],
+            **({"profile": active_profiler().snapshot()} if active_profiler() else {}),
+        }
+
+    # Chat ---------------------------------------------------------------
+
+    async def _chat(self, request, writer):
+        if not isinstance(request, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        prompt = str(request.get("prompt") or "").strip()
+        if not prompt:
+            raise HTTPError(400, "prompt is required")
+        if self._closing or len(self._streams) >= self.max_streams:
+            self.rejected += 1
+            raise HTTPError(503, "server busy", {"Retry-After": "1"})
+        session_id = str(request.get("session_id") or uuid.uuid4().hex[:12])
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        stream = asyncio.current_task()
+        self._streams.add(stream)
+        self.served += 1
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        producer = asyncio.create_task(self._produce(prompt, session_id, queue))
+        try:
+            await self._consume(queue, writer)
+        finally:
+            self._streams.discard(stream)
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def _consume(self, queue, writer):
+        """Write queued events to the client, folding bursts of deltas into one frame"""
+        pending = _NOTHING
+        while True:
+            payload, pending = (await queue.get() if pending is _NOTHING else pending), _NOTHING
+            if payload is None:
+                return
+            if payload["event"] == "delta":
+                while not queue.empty():
+                    following = queue.get_nowait()
+                    if following is None or following["event"] != "delta":
+                        pending = following
+                        break
+                    payload["text"] += following["text"]
+            writer.write(sse(payload))
+            try:
+                await asyncio.wait_for(writer.drain(), self.send_timeout)
+            except asyncio.TimeoutError:
+                self.slow_clients += 1
+                return
+
+    async def _produce(self, prompt, session_id, queue):
+        async def emit(payload, timeout=None):
+            await asyncio.wait_for(queue.put(payload), timeout)
+
+        # Cancellation (client gone, too slow, or shutdown) propagates: nobody is left to read the queue
+        try:
+            await self._run_turn(prompt, session_id, emit)
+        except RateLimitError as e:
+            await emit({"event": "error", "error": "rate limited", "retry_after": retry_after(e, 10)})
+        except Exception as e:
+            await emit({"event": "error", "error": f"{type(e).__name__}: {e}"})
+        await queue.put(None)
+
+    @contextlib.asynccontextmanager
+    async def _session_lock(self, session_id):
+        """Per-conversation lock, dropped again once no turn holds or waits for it"""
+        entry = self._session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._session_locks[session_id]
+
+    async def _run_turn(self, prompt, session_id, emit):
+        # Turns of one conversation run one at a time; different conversations run side by side
+        async with self._session_lock(session_id):
+            memory = self.sessions.load(session_id)
+            await emit({"event": "session", "session_id": session_id, "turns": len(memory.turns)})
+            started = time.perf_counter()
+
+            local_answer = evaluate_prompt(prompt)
+            if local_answer:
+                expression, value = local_answer
+                output = f"{expression} = {value}"
+                await emit({"event": "agent", "agent": "Calculator"})
+                await emit({"event": "delta", "text": output})
+                memory.add_turn(prompt, output, None)
+                self.sessions.save(memory)
+                await emit({"event": "done", "agent": "Calculator", "output": output, "seconds": 0.0})
+                return
+
+            if get_settings().sticky_routing and memory.last_agent:
+                starting_agent, _ = pick_follow_up_agent(prompt, memory.last_agent)
+            else:
+                starting_agent = pick_starting_agent(prompt)
+
+            response_cache = None if memory.has_history else get_response_cache()
+            cached = response_cache.lookup(prompt, starting_agent) if response_cache else None
+            if cached:
+                await emit({"event": "agent", "agent": cached["final_agent"]})
+                await emit({"event": "delta", "text": cached["output"]})
+                memory.add_turn(prompt, cached["output"], cached["final_agent"])
+                self.sessions.save(memory)
+                await emit({"event": "done", "agent": cached["final_agent"], "output": cached["output"],
+                            "cached": True, "seconds": round(time.perf_counter() - started, 4)})
+                return
+
+            run_input = self.context_window.build_input(memory, prompt) if memory.has_history else prompt
+            tracker = start_run(prompt, starting_agent.name)
+            candidates = speculation_candidates(prompt) if starting_agent is triage_agent else []
+            res = run_streamed(
+                starting_agent, run_input, get_run_config(), candidates, get_settings().speculative_max_tokens
+            )
+            try:
+                await emit({"event": "agent", "agent": starting_agent.name})
+                async for event in res.stream_events():
+                    if tracker:
+                        tracker.observe(event)
+                    payload = map_event(event)
+                    if payload is not None and payload != {"event": "agent", "agent": starting_agent.name}:
+                        # Waiting here is the backpressure: the run only advances as fast as the client reads
+                        await emit(payload, self.send_timeout)
+            except BaseException as e:
+                res.cancel()
+                if tracker:
+                    tracker.finish(error=e if isinstance(e, Exception) else None)
+                raise
+            if tracker:
+                tracker.finish(res)
+            if response_cache:
+                response_cache.save(prompt, starting_agent, res.final_output, res.last_agent)
+            memory.add_turn(prompt, str(res.final_output), res.last_agent.name)
+            self.sessions.save(memory)
+
+            usage = res.context_wrapper.usage
+            await emit({
+                "event": "done",
+                "agent": res.last_agent.name,
+                "output": str(res.final_output),
+                "usage": {"requests": usage.requests, "total_tokens": usage.total_tokens},
+                "seconds": round(time.perf_counter() - started, 4),
+            })
+
+
+async def serve(args):
+    settings = get_settings()
+    server = await ChatServer(
+        args.host or settings.server_host,
+        args.port or settings.server_port,
+        settings.server_max_streams,
+        settings.server_queue_size,
+        settings.server_send_timeout,
+        settings.server_shutdown_grace,
+    ).start()
+    print(f"🌐 Serving the triage system on http://{server.host}:{server.port} (POST /v1/chat)")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C still raises KeyboardInterrupt out of asyncio.run
+            pass
+    try:
+        await stop.wait()
+    finally:
+        print("\n🛑 Shutting down...")
+        await server.shutdown()
+        print(f"👋 Served {server.served} stream(s)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", help="bind address (default SERVER_HOST)")
+    parser.add_argument("--port", type=int, help="port (default SERVER_PORT)")
+    parser.add_argument("--mock", action="store_true", help="serve from the local mock model server")
+    parser.add_argument("--profile", action="store_true", help="profile the event loop (default PROFILE)")
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        if args.mock:
+            from benchmarks.mock_server import BackgroundMockServer, use_mock_endpoint
+
+            mock = stack.enter_context(BackgroundMockServer())
+            use_mock_endpoint(mock)
+            print(f"🧪 Mock model backend on {mock.base_url}")
+        try:
+            asyncio.run(profiled(serve(args), args.profile or None))
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())